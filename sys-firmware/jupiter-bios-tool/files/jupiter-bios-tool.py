@@ -11,6 +11,17 @@ Automatically analyze, verify, backup/generate/inject UID, and dynamically trim
 any/all Steam Deck (jupiter) BACKUP and RELEASE BIOS (*_sign.fd) (>0x1000000)
 images to 0x1000000 for hardware flashing/programming to a Winbond W25Q128JW
 128Mb (16MB) Serial NOR Flash.
+
+Importable (no import-time side effects) - analyze(), trim(), backup_uid(),
+generate_uid(), generate_uids(), inject_uid(), inject_uids(), remove_uid(), and
+locate_regions() return result dicts and raise BiosError (region_index() and
+read_region() index/read the regions of their info); with Timings() as t:
+records their per-phase timings (t.result()); main() is the CLI. e.g.:
+
+  loader = importlib.machinery.SourceFileLoader('jupiter_bios_tool', '/usr/bin/jupiter-bios-tool')
+  jbt = types.ModuleType(loader.name)
+  loader.exec_module(jbt)
+  jbt.analyze('F7G0105_sign.fd')['bios_ver']
 """
 
 # minimum      :  Python 2.6+/3.1+ (requires backported module: argparse)
@@ -18,12 +29,21 @@ images to 0x1000000 for hardware flashing/programming to a Winbond W25Q128JW
 
 # pylint: disable=C
 
-import argparse
 import base64
+import errno
+import functools
+import glob
+import hashlib
+import json
+import mmap
 import os
 import random
+import re
 import string
+import struct
 import sys
+import tempfile
+import time
 
 ver = '0.4'
 cyr = '2022-2023'
@@ -122,6 +142,167 @@ bios_uid_offset_str = b'$DMI'
 #bios_uid_size_f7a = 0x174
 bios_uid_size = None
 
+# signature table - signature/relative offset tuple lists per detection (kind)
+# loadable/extendable from a (versioned) JSON file (--signatures) - new releases without code changes
+sig_table_ver = 1
+sig_table = {
+    'version': sig_table_ver,
+    # [(bios_ver_offset_str, bios_ver_offset_str_offset, bios_ver_size, tbios_ver_size)]
+    'bios_ver': [
+        (bios_ver_offset_str_f7g, bios_ver_offset_str_offset, bios_ver_size, tbios_ver_size),
+        (bios_ver_offset_str_f7a, bios_ver_offset_str_offset, bios_ver_size, tbios_ver_size)],
+    # [(ec_rev_offset_str, ec_rev_offset_str_offset, ec_rev_size, ec_date_offset_str_offset, ec_date_size)]
+    'ec': ec_offset_list,
+    # [(bios_date_offset_str, bios_date_offset_str_offset, bios_date_size)]
+    'bios_date': [(bios_date_offset_str, bios_date_offset_str_offset, bios_date_size)],
+    # [(bios_offset_str, bios_offset_str_offset)]
+    'bios_offset': [(bios_offset_str, bios_offset_str_offset)],
+    # [(bios_uid_offset_str,)]
+    'bios_uid': [(bios_uid_offset_str,)]}
+# signature scan - up to sig_find_max signatures are searched one find each (memchr), larger tables in one alternation pass
+sig_find_max = 16
+
+# analysis cache (--cache) - one JSON entry per image/signature table, least recently used (mtime) evicted beyond analysis_cache_size bytes
+analysis_cache_ver = 1
+analysis_cache_mode_list = ['stat', 'hash', 'verify']
+# default: $XDG_CACHE_HOME/jupiter-bios-tool (~/.cache/jupiter-bios-tool)
+analysis_cache_dir = None
+analysis_cache_size = 0x100000
+
+# fingerprint index (--fingerprints) - known images by SHA-256 of the whole image and of its BIOS region (bios_size bytes at BIOS offset)
+fingerprint_index_ver = 1
+fingerprint_index_default_file = 'jupiter-BIOS-fingerprints.json'
+fingerprint_entry_keys = ['size', 'size_class', 'bios_ver', 'ec_rev', 'bios_date', 'bios_offset', 'bios_uid_offset', 'release', 'trimmed', 'invalid']
+fingerprint_chunk_size = 0x100000
+
+# DESTINATION write - SOURCE byte range copy methods (in the kernel, in order) / errno list to fall back on / buffered fallback chunk byte size
+copy_range_method_list = [m for m in ('copy_file_range', 'sendfile') if hasattr(os, m)]
+copy_range_fallback_errno_list = [errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP]
+copy_chunk_size = 0x100000
+# clone (one-to-many injection) - reflink (FICLONE ioctl) where supported, copy_range otherwise
+clone_method_list = ['ficlone'] if sys.platform.startswith('linux') else []
+clone_fallback_errno_list = copy_range_fallback_errno_list + [errno.ENOTTY]
+ficlone = 0x40049409
+# DESTINATION verification (--verify) - compare chunk byte size
+verify_chunk_size = 0x400000
+# mirrored blocks - [(name, analyze info offset key, value key (block byte size, None: bios_date_size), mirror delta)]
+mirror_list = [
+    ('BIOS version', 'bios_ver_offset', 'bios_ver', 0x800000),
+    ('EC revision', 'ec_rev_offset', 'ec_rev', 0x40000),
+    ('EC date', 'ec_date_offset', 'ec_date', 0x40000),
+    ('BIOS date', 'bios_date_offset', None, 0x800000)]
+# region index (--region) - EC firmware block byte size (mirrored at +0x40000) / bytes read around each preset offset (validated positional reads)
+ec_firmware_size = 0x40000
+region_preset_margin = 0x100
+# preset layout accepted only if all of these are detected in the preset blocks (else full scan)
+region_preset_key_list = ['bios_ver', 'ec_rev', 'ec_date', 'bios_date', 'bios_uid_offset']
+# diff (--diff) - changed ranges closer than diff_merge_gap equal bytes are merged / NumPy-less compare block byte size
+diff_merge_gap = 0x10
+diff_block_size = 0x10000
+# delta (--delta) - W25Q128JW erase block byte sizes (4KB sector, 64KB block) and typical erase/page program times (ms)
+flash_erase_size_list = [0x1000, 0x10000]
+flash_erase_ms = {0x1000: 45, 0x10000: 150}
+flash_page_size = 0x100
+flash_page_program_ms = 0.4
+delta_mode_list = ['auto', '4k', '64k']
+# header: magic, version, image byte size, entry count, base SHA-256, target SHA-256 / entry: offset, byte size, erase only (no data)
+delta_magic = b'JBTDELTA'
+delta_ver = 1
+delta_header_format = '<8sHII32s32s'
+delta_entry_format = '<IIB'
+delta_layout_ext = '.layout'
+# erased (0xFF) block map - block byte size (4KB sector) / whole chunk compare byte size (fast path)
+erased_block_size = flash_erase_size_list[0]
+erased_chunk_size = 0x100000
+# compact container (--compact/--expand) - erased runs not stored; layouts: packed (non-erased bytes back to back), sparse (non-erased bytes at image offsets, erased runs left as file holes)
+# header: magic, version, layout, image byte size, erased block byte size, run count, data offset, image SHA-256 / run: offset, byte size
+compact_magic = b'JBTCMPCT'
+compact_ver = 1
+compact_layout_list = ['packed', 'sparse']
+compact_header_format = '<8sHHIIII32s'
+compact_run_format = '<II'
+
+# synthetic BIOS images (--synthesize/--benchmark) - file name, erased (0xFF) BIOS offset, erased bytes after UID, BIOS date (BCD), EC revisions, EC date (truncated to EC date byte size)
+synth_file = 'synthetic-%s'
+synth_erased_offset = 0xf00000
+synth_uid_padding = 0x1000
+synth_bios_date = b'\x23\x10\x31'
+synth_ec_rev_f7g = 'F7G014'
+synth_ec_rev_f7a = 'F7A011'
+synth_ec_date = '2023/11/22 1234'
+# benchmark batch analyze image counts
+bench_batch_size_list = [1, 8, 32]
+
+# daemon (--daemon) - SOURCE image ops / resident analyzed SOURCE images (least recently used evicted) / UIDs per generate request (bounded memory)
+daemon_op_list = ['analyze', 'backup', 'trim', 'inject', 'remove']
+daemon_resident_size = 8
+daemon_generate_max = 0x1000
+
+# release BIOS library (--release) - directories searched (--library overrides), index (analysis cache directory) version / entry keys
+# (entries with any undetected library_detect_keys field re-analyzed by full scan and never written to the index)
+library_dir_list = ['jupiter_bios', '/usr/share/jupiter_bios']
+library_ver = 1
+library_detect_keys = ['bios_ver', 'ec_rev', 'ec_date', 'bios_date']
+library_entry_keys = library_detect_keys + ['size_class', 'size', 'invalid']
+
+# watch (--watch) - event wait/poll interval, settle time (polling: size/mtime unchanged), processed state file (OUTPUT_DIR) and version, OUTPUT_DIR file (SOURCE name, UID/trimmed)
+watch_poll_interval = 0.2
+watch_settle_time = 0.5
+watch_state_file = '.jupiter-watch.json'
+watch_state_ver = 1
+watch_dest_file = '%s-%s.bin'
+# watch inotify event masks - IN_CLOSE_WRITE | IN_MOVED_TO (finished files), IN_Q_OVERFLOW (events lost - relist)
+watch_inotify_mask = 0x8 | 0x80
+watch_inotify_overflow = 0x4000
+
+# phase timings (--timings) - active Timings recorder (None: disabled)
+timings = None
+
+# batch - directory SOURCE BIOS image extension list (globs/files are taken as-is)
+batch_ext_list = ['.bin', '.fd', '.rom']
+# batch NDJSON record keys
+batch_record_keys = ['src', 'size', 'size_class', 'bios_ver', 'ec_rev', 'ec_date', 'bios_date', 'bios_offset', 'bios_uid_offset', 'bios_uid_size', 'release', 'trimmed', 'invalid']
+
+# archive SOURCE (zip/tar[.gz|.bz2|.xz] file or stdin -) - member pattern / head byte size / magic tuple list [(offset, magic, kind)] / DESTINATION directory file (member, op)
+archive_member_pattern = '*_sign.fd'
+archive_head_size = 0x200
+archive_magic_list = [
+    (0x0, b'PK\x03\x04', 'zip'),
+    (0x0, b'\x1f\x8b', 'tar.gz'),
+    (0x0, b'BZh', 'tar.bz2'),
+    (0x0, b'\xfd7zXZ\x00', 'tar.xz'),
+    (0x101, b'ustar', 'tar')]
+archive_dest_file = '%s-%s.bin'
+# archive SOURCE unsupported option tuple list [(dest, option)] (members trimmed/injected/removed into DESTINATION directory only) - rejected
+archive_unsupported_option_list = [
+    ('backup_uid', '-b/--backup-uid'),
+    ('generate_uid', '-g/--generate-uid'),
+    ('inject_uids', '--inject-uids'),
+    ('registry', '--registry'),
+    ('diff', '--diff'),
+    ('delta', '--delta'),
+    ('apply_delta', '--apply-delta'),
+    ('compact', '--compact')]
+
+# streaming SOURCE (stdin, pipes, devices, --stream) - read chunk byte size / bytes captured around each signature (table string offsets/sizes)
+stream_chunk_size = 0x10000
+stream_capture_margin = 0x100
+# streaming SOURCE unsupported option tuple list [(dest, option)] (SOURCE read once, DESTINATION written as data flows) - rejected
+stream_unsupported_option_list = [
+    ('generate_uid', '-g/--generate-uid'),
+    ('inject_uids', '--inject-uids'),
+    ('diff', '--diff'),
+    ('delta', '--delta'),
+    ('apply_delta', '--apply-delta'),
+    ('compact', '--compact')]
+
+# deduplicating BIOS backup store (--store) - manifest version / chunk byte size (64KB flash erase block, aligned at the BIOS offset) / zlib level / chunk and manifest directories
+store_ver = 1
+store_chunk_size = 0x10000
+store_compress_level = 6
+store_chunk_dir = 'chunks'
+store_manifest_dir = 'manifests'
+
 # download/network
 url = 'https://gitlab.com/evlaV'
 repo = 'jupiter-PKGBUILD'
@@ -156,6 +337,27 @@ uid_2_f7a = '0x00,0x00,0x00,0x00-0x00,0x00,0x00,0x00-0x00,0x00,0x00,0x00'
 uid_2_null_f7a = b'\xff' * len(uid_2_f7a)
 backup_uid_default_file = 'jupiter-UID-backup.bin'
 generate_uid_default_file = 'jupiter-UID-generated.bin'
+# bulk generation (--count) to a directory - one file per UID, named by F serial
+generate_uid_dir_file = 'jupiter-UID-%s.bin'
+# one-to-many injection DESTINATION file (BIOS version, UID name)
+inject_uids_dest_file = 'jupiter-%s-bios-injected-%s.bin'
+# ME/F serial slot size (4 byte prefix + 8 byte serial)
+uid_serial_size = 0xc
+# pseudorandom retries per UID before giving up on a unique serial
+uid_generate_attempts = 0x100
+# UID ($DMI) record stream - record header (SMBIOS type, field offset, flag, record byte size) / parse bound (byte size)
+dmi_header_format = '<BBBH'
+dmi_header_size = struct.calcsize(dmi_header_format)
+dmi_max_size = 0x1000
+# record kind tuple list [((SMBIOS type, field offset), kind)] - other OEM string (type 11) records: version (float) or string
+dmi_kind_list = [
+    ((0x1, 0x7), 'f_serial'),
+    ((0x2, 0x7), 'me_serial')]
+# OEM string (SMBIOS type 11) record type
+dmi_oem_type = 0xb
+# UID registry (--registry) - SQLite schema version / default file
+registry_ver = 1
+registry_default_file = 'jupiter-UID-registry.sqlite'
 
 # info/misc (fallback/preliminary/unused)
 # RELEASE BIOS UID offset tuple list - [byte_size_int, str]
@@ -175,18 +377,2361 @@ rel_bios_date_offset_list = [0x790dd1, 0xf90dd1]
 bios_date_offset_list = [0x6a8161, 0xea8161]
 invalid = None
 name_list = ['aerith', 'chachani', 'galileo', 'jupiter', 'sephiroth', 'steamdeck', 'vangogh']
+# CLI exit status list (BiosError) followed by abort!
+abort_status_list = [6, 7, 8, 10, 11]
 rcl = ['━', '┅', '┉', '╍', '═', '╳', '`', '~', '@', '#', '$', '%', '^', '&', '*', '-', '=', '+', '\\', '|', ';', ':', "'", '"', ',', '<', '.', '>', '/', '?', 'w', 'W', '0', 'o', 'O', 's', 'S', 'z', 'Z', 'x', 'X', 'v', 'V', 'n', 'N', 'm', 'M']
-rc = random.choice(rcl)
 
-# title
-print("""
+
+def load_sig_table(path):
+    """load signature table (JSON) - signature strings are latin-1 (\\u00XX) encoded bytes; omitted kinds keep the built-in table"""
+    with open(path) as tf:
+        table = json.load(tf)
+    if not isinstance(table, dict) or table.get('version') != sig_table_ver:
+        raise ValueError('unsupported signature table version (%s != %s)' % (table.get('version') if isinstance(table, dict) else None, sig_table_ver))
+    loaded = dict(sig_table)
+    for kind in sig_table:
+        if kind == 'version' or kind not in table:
+            continue
+        loaded[kind] = [tuple([entry[0].encode('latin-1')] + list(entry[1:])) for entry in table[kind]]
+    return loaded
+
+
+def table_sigs(table):
+    """signature table signature list (all kinds)"""
+    return [entry[0] for kind in table if kind != 'version' for entry in table[kind]]
+
+
+def find_sigs(data, pending, start=0):
+    """find first offset of pending signatures in data from start - up to sig_find_max signatures one find (memchr) each, more in one pass of a compiled alternation (recompiled over the still pending signatures after each hit); found signatures are removed from pending, {sig: offset} returned"""
+    found = {}
+    if len(pending) <= sig_find_max:
+        for sig in pending[:]:
+            offset = data.find(sig, start)
+            if offset >= 0:
+                found[sig] = offset
+                pending.remove(sig)
+        return found
+    while pending:
+        match = re.compile(b'|'.join(re.escape(sig) for sig in pending)).search(data, start)
+        if match is None:
+            break
+        # every pending signature at the match (same start/prefixes)
+        for sig in pending[:]:
+            if data[match.start():match.start() + len(sig)] == sig:
+                found[sig] = match.start()
+                pending.remove(sig)
+        start = match.start() + 1
+    return found
+
+
+def scan_sigs(data, sigs):
+    """find first offset (or -1) of every signature in data (find_sigs) - scan cost bounded as the signature table grows"""
+    sig_offsets = dict.fromkeys(sigs, -1)
+    sig_offsets.update(find_sigs(data, list(sig_offsets)))
+    return sig_offsets
+
+
+class Timings(object):
+    """phase timings recorder - with Timings() as t: (module functions record phase wall time, bytes read/mapped and written, peak traced memory) then t.result(); batch worker processes not included"""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        # phase name -> [wall time (s), count] (first recorded order)
+        self.phases = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.wall = None
+        self.peak = None
+
+    def __enter__(self):
+        global timings
+        self.previous, timings = timings, self
+        if self.memory:
+            # imported on demand - timings only
+            import tracemalloc
+            tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        global timings
+        self.wall = time.perf_counter() - self.start
+        if self.memory:
+            # imported on demand - timings only
+            import tracemalloc
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        timings = self.previous
+        return False
+
+    def add(self, name, wall):
+        phase = self.phases.setdefault(name, [0.0, 0])
+        phase[0] += wall
+        phase[1] += 1
+
+    def lap(self):
+        last = [time.perf_counter()]
+
+        def lap(name):
+            now = time.perf_counter()
+            self.add(name, now - last[0])
+            last[0] = now
+        return lap
+
+    def result(self):
+        return {'wall': self.wall, 'phases': [{'phase': name, 'wall': wall, 'count': count} for name, (wall, count) in self.phases.items()],
+                'bytes_read': self.bytes_read, 'bytes_written': self.bytes_written, 'peak': self.peak}
+
+
+def no_lap(name):
+    """phase lap of disabled timings - no-op"""
+
+
+def timings_lap():
+    """phase lap function of the active timings - lap(name) records the wall time since the previous lap (or this call) as phase name; no-op without timings"""
+    return no_lap if timings is None else timings.lap()
+
+
+def count_bytes(read=0, written=0):
+    """add byte counts to the active timings - no-op without timings"""
+    if timings is not None:
+        timings.bytes_read += read
+        timings.bytes_written += written
+
+
+def map_bios(f):
+    """map BIOS image file object (read-only) - fallback to read for empty or unmappable (e.g., special) files"""
+    lap = timings_lap()
+    try:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, EnvironmentError):
+        data = f.read()
+    count_bytes(read=len(data))
+    lap('open/read')
+    return data
+
+
+def analyze_bios(data, size=None, table=None, sig_offsets=None):
+    """analyze/verify BIOS image data (bytes/mmap, or SparseImage with its sig_offsets) - detection result dict (UID is a memoryview slice of data)"""
+    lap = timings_lap()
+    if size is None:
+        size = len(data)
+    if table is None:
+        table = sig_table
+    view = data if isinstance(data, SparseImage) else memoryview(data)
+    info = {
+        'size': size, 'size_class': None,
+        'bios_ver': None, 'bios_ver_offset': None,
+        'ec_rev': None, 'ec_rev_offset': None, 'ec_date': None, 'ec_date_offset': None,
+        'bios_date': None, 'bios_date_offset': None,
+        'release': False, 'trimmed': False,
+        'bios_offset': bios_offset_list[0][0], 'bios_offset_fallback': None, 'detect_rel_bios_ver': None, 'invalid': None,
+        'bios_uid': None, 'bios_uid_offset': None, 'bios_uid_size': None}
+    # detect RELEASE BIOS byte size
+    for drb_size, drb_str in rel_bios_size_list:
+        if size == drb_size:
+            info['size_class'] = drb_str
+            break
+    lap('detect: size')
+    # scan all signature table signatures (find_sigs)
+    if sig_offsets is None:
+        sig_offsets = scan_sigs(data, table_sigs(table))
+    lap('detect: signature scan')
+    # detect BIOS image version
+    for ver_str, ver_str_offset, ver_size, tver_size in table['bios_ver']:
+        if sig_offsets[ver_str] >= 0:
+            ver_offset = sig_offsets[ver_str] + ver_str_offset
+            ver = str(view[ver_offset:ver_offset + ver_size], 'utf-8')
+            tver = str(view[ver_offset + ver_size:ver_offset + ver_size + tver_size], 'utf-8')
+            if tver.isalnum():
+                ver += tver
+            info['bios_ver'], info['bios_ver_offset'] = ver, ver_offset
+            break
+    lap('detect: BIOS version')
+    # detect BIOS image revision/date
+    for rev_str, rev_str_offset, rev_size, date_str_offset, date_size in table['ec']:
+        if sig_offsets[rev_str] >= 0:
+            rev_offset = sig_offsets[rev_str] + rev_str_offset
+            rev = str(view[rev_offset:rev_offset + rev_size], 'utf-8')
+            #if not rev[1:].isdigit():
+            if not rev.isalnum():
+                info['ec_rev'] = None
+                continue
+            info['ec_rev'], info['ec_rev_offset'] = rev, rev_offset
+            date_offset = sig_offsets[rev_str] + date_str_offset
+            date = str(view[date_offset:date_offset + date_size], 'utf-8')
+            if not date[:4].isdigit() or not date[5:7].isdigit() or not date[8:10].isdigit():
+                info['ec_date'] = None
+                continue
+            info['ec_date'], info['ec_date_offset'] = date, date_offset
+            break
+    lap('detect: EC revision/date')
+    for date_str, date_str_offset, date_size in table['bios_date']:
+        if sig_offsets[date_str] >= 0:
+            date_offset = sig_offsets[date_str] + date_str_offset
+            date_bin = view[date_offset:date_offset + date_size]
+            # 20YY/MM/DD
+            info['bios_date'] = '20' + format(int(hex(date_bin[0])[2:]), '02') + '/' + format(int(hex(date_bin[1])[2:]), '02') + '/' + format(int(hex(date_bin[2])[2:]), '02')
+            info['bios_date_offset'] = date_offset
+            break
+    lap('detect: BIOS date')
+    # header checks
+    if view[:len(rel_header)] == rel_header:
+        info['release'] = True
+    else:
+        # sort by size (large -> small) - F7A must be before F7G
+        # 1) F7A (5) 2) F7G (1)
+        for header in bios_header_f7a, bios_header_f7g:
+            if view[:len(header)] == header:
+                info['trimmed'] = True
+                info['bios_offset'] = 0x0
+                break
+    lap('detect: header')
+    # detect BIOS offset
+    if not info['trimmed']:
+        for offset_str, offset_str_offset in table['bios_offset']:
+            if sig_offsets[offset_str] >= 0:
+                # negative: CORRUPT or INVALID (fewer bytes)
+                info['bios_offset'] = sig_offsets[offset_str] + offset_str_offset
+                # detect BIOS image version
+                for drb_offset, drb_str in bios_offset_list:
+                    if info['bios_offset'] == drb_offset:
+                        info['detect_rel_bios_ver'] = drb_str
+                        break
+                break
+        else:
+            info['invalid'] = True
+            # fallback to (preset) bios_offset_list - [(offset_int, str, valid)]
+            info['bios_offset_fallback'] = []
+            for drb_offset, drb_str in bios_offset_list:
+                if isinstance(drb_offset, int) and isinstance(drb_str, str):
+                    for header in bios_header_f7a, bios_header_f7g:
+                        if view[drb_offset:drb_offset + len(header)] == header:
+                            info['bios_offset'] = drb_offset
+                            info['invalid'] = None
+                            break
+                    info['bios_offset_fallback'].append((drb_offset, drb_str, not info['invalid']))
+                    if not info['invalid']:
+                        break
+    lap('detect: BIOS offset')
+    # detect UID offset
+    for uid_str, in table['bios_uid']:
+        if sig_offsets[uid_str] >= 0:
+            uid_offset = sig_offsets[uid_str]
+            # walk the $DMI record headers (bounded) - malformed: search (bounded) for erased bytes
+            dmi = parse_dmi(view, uid_offset)
+            if dmi is not None and dmi['valid']:
+                uid_size = dmi['size']
+            else:
+                uid_size = data.find(b'\xff' * 4, uid_offset, uid_offset + dmi_max_size)
+                if uid_size >= 0:
+                    uid_size -= uid_offset
+            if uid_size >= 0:
+                uid = view[uid_offset:uid_offset + uid_size]
+            else:
+                uid = view[uid_offset:]
+            info['bios_uid_offset'], info['bios_uid_size'] = uid_offset, uid_size
+            # NO/NULL UID
+            if uid and uid != uid_str:
+                info['bios_uid'] = uid
+            break
+    lap('detect: UID')
+    return info
+
+
+def cache_path(key=None):
+    """analysis cache directory (analysis_cache_dir, default $XDG_CACHE_HOME/jupiter-bios-tool) - or entry file for key"""
+    path = analysis_cache_dir or os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'jupiter-bios-tool')
+    return os.path.join(path, key + '.json') if key else path
+
+
+def cache_key(path, data, mode, table):
+    """analysis cache key (stat: device/inode/size/mtime, hash: SHA-256 content) and content SHA-256 (hash/verify, else None)"""
+    digest = hashlib.sha256(data).hexdigest() if mode in ('hash', 'verify') else None
+    if mode == 'hash':
+        ident = ['hash', digest]
+    else:
+        st = os.stat(path)
+        ident = ['stat', st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns]
+    # tool/cache/signature table versions - stale entries never match
+    ident += [ver, analysis_cache_ver, repr(sorted(table.items()))]
+    return hashlib.sha256(json.dumps(ident).encode('utf-8')).hexdigest(), digest
+
+
+def cache_load(key, digest=None):
+    """load analysis cache entry (mark recently used) - analyze_bios info without data/UID, or None (miss/stale/content mismatch)"""
+    entry_file = cache_path(key)
+    try:
+        with open(entry_file) as cache_if:
+            entry = json.load(cache_if)
+        os.utime(entry_file, None)
+    except (EnvironmentError, ValueError):
+        return None
+    if entry.get('ver') != analysis_cache_ver or (digest is not None and entry.get('sha256') != digest):
+        return None
+    return entry['info']
+
+
+def cache_store(key, info, digest=None):
+    """store analyze_bios info (without data/UID) in the analysis cache - evict least recently used entries beyond analysis_cache_size"""
+    null_uid = info['bios_uid'] is None
+    info = dict((k, v) for k, v in info.items() if k not in ('bios_uid', 'data', 'src', 'cached', 'regions'))
+    info['bios_uid_null'] = null_uid
+    path = cache_path()
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        # atomic (concurrent batch workers)
+        fd, tmp_file = tempfile.mkstemp(prefix='.', suffix='.json', dir=path)
+        with os.fdopen(fd, 'w') as cache_of:
+            json.dump({'ver': analysis_cache_ver, 'sha256': digest, 'info': info}, cache_of)
+        os.replace(tmp_file, cache_path(key))
+        entries = []
+        for name in os.listdir(path):
+            if name.endswith('.json') and not name.startswith('.'):
+                st = os.stat(os.path.join(path, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(entry[1] for entry in entries)
+        for mtime, size, name in sorted(entries):
+            if total <= analysis_cache_size:
+                break
+            os.remove(os.path.join(path, name))
+            total -= size
+    except EnvironmentError:
+        pass
+
+
+def analyze_bios_cached(path, data, size=None, table=None, cache=None):
+    """analyze_bios through the analysis cache (cache mode: stat, hash, verify - stat key checked against content SHA-256; None: disabled) - info['cached'] set"""
+    if table is None:
+        table = sig_table
+    if not cache:
+        return analyze_bios(data, size, table)
+    lap = timings_lap()
+    key, digest = cache_key(path, data, cache, table)
+    info = cache_load(key, digest if cache == 'verify' else None)
+    lap('cache: lookup')
+    if info is None:
+        info = analyze_bios(data, size, table)
+        lap = timings_lap()
+        cache_store(key, info, digest)
+        lap('cache: store')
+        info['cached'] = False
+        return info
+    # restore fallback tuples and UID (memoryview slice of data)
+    if info['bios_offset_fallback'] is not None:
+        info['bios_offset_fallback'] = [tuple(fallback) for fallback in info['bios_offset_fallback']]
+    uid_offset, uid_size = info['bios_uid_offset'], info['bios_uid_size']
+    if info.pop('bios_uid_null') or uid_offset is None:
+        info['bios_uid'] = None
+    else:
+        view = memoryview(data)
+        info['bios_uid'] = view[uid_offset:uid_offset + uid_size] if uid_size >= 0 else view[uid_offset:]
+    info['cached'] = True
+    return info
+
+
+def sha256_chunked(data):
+    """SHA-256 hex digest of data (bytes/mmap/memoryview) - fed in fingerprint_chunk_size memoryview slices (zero-copy)"""
+    view = memoryview(data)
+    digest = hashlib.sha256()
+    for offset in range(0, len(view), fingerprint_chunk_size):
+        digest.update(view[offset:offset + fingerprint_chunk_size])
+    return digest.hexdigest()
+
+
+def fingerprint(data, bios_offset):
+    """fingerprint BIOS image data - (image SHA-256, BIOS region SHA-256 or None) hashed concurrently (threads - hashlib releases the GIL)"""
+    # imported on demand - fingerprinting only
+    import concurrent.futures
+    view = memoryview(data)
+    regions = [view]
+    if 0 <= bios_offset and bios_offset + bios_size <= len(view):
+        regions.append(view[bios_offset:bios_offset + bios_size])
+    lap = timings_lap()
+    with concurrent.futures.ThreadPoolExecutor(len(regions)) as executor:
+        digests = list(executor.map(sha256_chunked, regions))
+    lap('fingerprint')
+    return digests[0], digests[1] if len(digests) > 1 else None
+
+
+def load_fingerprints(path):
+    """load fingerprint index (JSON, missing file: empty) - dict of image and BIOS region SHA-256 lookup dicts"""
+    index = {'version': fingerprint_index_ver, 'images': {}, 'bios': {}}
+    if not os.path.isfile(path):
+        return index
+    with open(path) as index_if:
+        loaded = json.load(index_if)
+    if not isinstance(loaded, dict) or loaded.get('version') != fingerprint_index_ver:
+        raise ValueError('unsupported fingerprint index version (%s != %s)' % (loaded.get('version') if isinstance(loaded, dict) else None, fingerprint_index_ver))
+    index['images'] = loaded['images']
+    index['bios'] = dict((entry['bios_sha256'], entry) for entry in index['images'].values() if entry.get('bios_sha256'))
+    return index
+
+
+def identify(index, image_sha256, bios_sha256=None):
+    """identify fingerprint in index - (match: image/bios, entry) or None"""
+    if image_sha256 in index['images']:
+        return ('image', index['images'][image_sha256])
+    # e.g., TRIMMED image of an indexed RELEASE image
+    if image_sha256 in index['bios']:
+        return ('bios', index['bios'][image_sha256])
+    if bios_sha256 is not None and bios_sha256 in index['bios']:
+        return ('bios', index['bios'][bios_sha256])
+    return None
+
+
+def add_fingerprints(path, srcs, table=None, cache=None):
+    """analyze/fingerprint SOURCE BIOS images into the fingerprint index file path (atomic rewrite) - added entry list"""
+    index = load_fingerprints(path)
+    added = []
+    for src in srcs:
+        info = analyze(src, table, cache)
+        image_sha256, bios_sha256 = fingerprint(info['data'], info['bios_offset'])
+        entry = {'name': os.path.basename(src), 'sha256': image_sha256, 'bios_sha256': bios_sha256}
+        entry.update((key, info[key]) for key in fingerprint_entry_keys)
+        entry['invalid'] = bool(entry['invalid'])
+        index['images'][image_sha256] = entry
+        added.append(entry)
+    fd, tmp_file = tempfile.mkstemp(prefix='.', suffix='.json', dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, 'w') as index_of:
+        json.dump({'version': fingerprint_index_ver, 'images': index['images']}, index_of, indent=1, sort_keys=True)
+    os.replace(tmp_file, path)
+    return added
+
+
+def analyze_bios_file(path, table=None, cache=None, fingerprints=None):
+    """analyze/verify BIOS image file (optionally fingerprinted/identified against fingerprints index) - batch NDJSON record dict (error record on failure)"""
+    try:
+        with open(path, 'rb') as f:
+            data = map_bios(f)
+        info = analyze_bios_cached(path, data, os.path.getsize(path), table, cache)
+        info['src'] = path
+        info['invalid'] = bool(info['invalid'])
+        record = dict((key, info[key]) for key in batch_record_keys)
+        if fingerprints is not None:
+            record['sha256'], record['bios_sha256'] = fingerprint(data, info['bios_offset'])
+            match = identify(fingerprints, record['sha256'], record['bios_sha256'])
+            record['identified'] = match and {'match': match[0], 'name': match[1]['name'], 'bios_ver': match[1]['bios_ver']}
+    except (EnvironmentError, ValueError) as e:
+        return {'src': path, 'error': str(e)}
+    return record
+
+
+def batch_paths(sources):
+    """expand SOURCE directories (recursive, batch_ext_list) and globs to BIOS image paths (sorted, unique)"""
+    paths = []
+    for source in sources:
+        for path in sorted(glob.glob(source)) or [source]:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    paths += [os.path.join(root, name) for name in sorted(files) if os.path.splitext(name)[1].lower() in batch_ext_list]
+            else:
+                paths.append(path)
+    seen = set()
+    return [path for path in paths if not (path in seen or seen.add(path))]
+
+
+def batch_analyze(sources, jobs=None, table=None, of=None, cache=None, fingerprints=None):
+    """analyze BIOS images in parallel (process pool) - stream NDJSON records in completion order, return record count"""
+    if of is None:
+        of = sys.stdout
+    paths = batch_paths(sources)
+    count = 0
+    if not paths:
+        return count
+    # imported on demand - batch only
+    import multiprocessing
+    pool = multiprocessing.Pool(min(jobs or multiprocessing.cpu_count(), len(paths)))
+    try:
+        for record in pool.imap_unordered(functools.partial(analyze_bios_file, table=table, cache=cache, fingerprints=fingerprints), paths):
+            of.write(json.dumps(record) + '\n')
+            of.flush()
+            count += 1
+    finally:
+        pool.close()
+        pool.join()
+    return count
+
+
+class BiosError(Exception):
+    """BIOS tool error - status is the CLI exit status"""
+
+    def __init__(self, message, status=1):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+def open_bios(path):
+    """map BIOS image file (read-only) - see map_bios"""
+    with open(path, 'rb') as f:
+        return map_bios(f)
+
+
+def analyze(src, table=None, cache=None):
+    """analyze/verify SOURCE BIOS image file (optionally through the analysis cache) - analyze_bios result dict plus src and (mapped) data"""
+    data = open_bios(src)
+    info = analyze_bios_cached(src, data, os.path.getsize(src), table, cache)
+    info['src'] = src
+    info['data'] = data
+    return info
+
+
+def dmi_record(rtype, field, flag, value):
+    """pack UID ($DMI) record - header (SMBIOS type, field offset, flag, record byte size) + value bytes"""
+    return struct.pack(dmi_header_format, rtype, field, flag, dmi_header_size + len(value)) + value
+
+
+def parse_dmi(data, offset=0, limit=dmi_max_size):
+    """parse UID ($DMI) record stream at offset - walks record headers within limit bytes (bounded, never past the declared record sizes); dict (size, records (kind: me_serial/f_serial/version/uid/string), valid) or None (no $DMI)"""
+    # bounded slice (zero-copy for memoryview data)
+    view = memoryview(data[offset:offset + limit])
+    if view[:len(bios_uid_offset_str)] != bios_uid_offset_str:
+        return None
+    kinds = dict(dmi_kind_list)
+    records = []
+    valid = True
+    pos = len(bios_uid_offset_str)
+    while pos < len(view):
+        # erased (0xFF) - end of records / next packed $DMI stream
+        if view[pos] == 0xff or view[pos:pos + len(bios_uid_offset_str)] == bios_uid_offset_str:
+            break
+        if pos + dmi_header_size > len(view):
+            valid = False
+            break
+        rtype, field, flag, size = struct.unpack_from(dmi_header_format, view, pos)
+        if size < dmi_header_size or pos + size > len(view):
+            valid = False
+            break
+        raw = view[pos + dmi_header_size:pos + size].tobytes()
+        kind, value = kinds.get((rtype, field)), None
+        # NO/NULL (erased) value
+        if raw.strip(b'\xff'):
+            value = raw.rstrip(b'\x00').decode('utf-8', 'replace')
+            if kind is None and rtype == dmi_oem_type:
+                try:
+                    kind, value = 'version', float(value)
+                except ValueError:
+                    kind = 'uid' if value.startswith('0x') else 'string'
+        records.append({'type': rtype, 'field': field, 'flag': flag, 'offset': pos, 'size': size, 'kind': kind, 'value': value})
+        pos += size
+    return {'size': pos, 'records': records, 'valid': valid}
+
+
+def uid_template(f7a=False):
+    """F7G/F7A UID ($DMI) record template - (template bytes, ME serial slot offsets, F serial slot offsets)"""
+    # OEM string (field offset, value) records
+    if f7a:
+        oem = [(0x6, b'5.' + b'5' * 15), (0x5, bytes(uid_1_f7a, 'utf-8')), (0x7, bytes(uid_2_f7a, 'utf-8'))]
+    else:
+        oem = [(0x8, b'14.' + b'5' * 15), (0x6, b'12.' + b'5' * 15), (0x5, bytes(uid_1_f7g, 'utf-8')), (0x7, bytes(uid_1_f7g, 'utf-8'))]
+    template = bytearray(bios_uid_offset_str)
+    me_slots, f_slots = [], []
+    # serial records (record + mirror) - record their value offsets and reserve uid_serial_size bytes
+    for rtype, slots in (0x2, me_slots), (0x1, f_slots):
+        for flag in 0x00, 0xff:
+            slots.append(len(template) + dmi_header_size)
+            template += dmi_record(rtype, 0x7, flag, b'\x00' * uid_serial_size)
+    for field, value in oem:
+        for flag in 0x00, 0xff:
+            template += dmi_record(dmi_oem_type, field, flag, value)
+    return bytes(template), me_slots, f_slots
+
+
+def generate_serials(rng=random, f7a=False, int_serial=False, ev2=False, ev3=False, overrides=None):
+    """generate (pseudorandom) ME/F serial pair (prefix + serial, uid_serial_size bytes each) - overrides dict (me_alpha, me_int, me_alnum, f_alpha, f_int, f_alnum) or module-level meYX_*/fXYY_*"""
+    if overrides is None:
+        overrides = {'me_alpha': meYX_alpha, 'me_int': meYX_int, 'me_alnum': meYX_alnum,
+                     'f_alpha': fXYY_alpha, 'f_int': fXYY_int, 'f_alnum': fXYY_alnum}
+    me_alpha, me_int, me_alnum = overrides.get('me_alpha'), overrides.get('me_int'), overrides.get('me_alnum')
+    f_alpha, f_int, f_alnum = overrides.get('f_alpha'), overrides.get('f_int'), overrides.get('f_alnum')
+    #if not me_alpha or not isinstance(me_alpha, str) or not me_alpha.isalpha() or not len(me_alpha) == 1 or not me_alpha[0].isupper():
+    if not me_alpha or not isinstance(me_alpha, str) or not me_alpha.isalpha():
+        #me_alpha = str(chr(rng.randint(ord('A'), ord('Z'))))
+        me_alpha = str(chr(rng.randint(65, 90)))
+    me_prefix = (b'MEB' if f7a else b'MEC') + bytes(me_alpha[0].upper(), 'utf-8')
+    if not me_int or not isinstance(me_int, int):
+        me_int = rng.randint(0, 99999999)
+    #me_int = '{:08d}'.format(me_int)
+    me_int = str(me_int).zfill(8)
+    if not me_alnum or not me_alnum.isalnum():
+        me_alnum = ''.join(rng.choice(string.ascii_letters + string.digits) for i in range(8))
+    me_alnum = str(me_alnum).zfill(8)
+    me_serial = bytes(me_int if int_serial else me_alnum.upper(), 'utf-8')
+    #if not f_alpha or not isinstance(f_alpha, str) or not f_alpha.isalpha() or not len(f_alpha) == 1 or not f_alpha[0].isupper():
+    if not f_alpha or not isinstance(f_alpha, str) or not f_alpha.isalpha():
+        #f_alpha = str(chr(rng.randint(ord('A'), ord('Z'))))
+        f_alpha = str(chr(rng.randint(65, 90)))
+    f_prefix = b'F' + bytes(f_alpha[0].upper(), 'utf-8') + (b'AA' if f7a else b'ZZ')
+    if not f_int or not isinstance(f_int, int):
+        if ev3:
+            f_int = int(str(133) + str(rng.randint(0, 99999)))
+        elif ev2:
+            f_int = int(str(132) + str(rng.randint(0, 99999)))
+        else:
+            f_int = rng.randint(0, 99999999)
+    #f_int = '{:08d}'.format(f_int)
+    f_int = str(f_int).zfill(8)
+    if not f_alnum or not f_alnum.isalnum():
+        if ev3:
+            f_alnum = '133' + ''.join(rng.choice(string.ascii_letters + string.digits) for i in range(5))
+        elif ev2:
+            f_alnum = '132' + ''.join(rng.choice(string.ascii_letters + string.digits) for i in range(5))
+        else:
+            f_alnum = ''.join(rng.choice(string.ascii_letters + string.digits) for i in range(8))
+    f_alnum = str(f_alnum).zfill(8)
+    f_serial = bytes(f_int if int_serial else f_alnum.upper(), 'utf-8')
+    return me_prefix + me_serial, f_prefix + f_serial
+
+
+def generate_uids(count=1, f7a=False, int_serial=False, ev2=False, ev3=False, seed=None, overrides=None, taken=None):
+    """generate count (pseudorandom) F7G/F7A UIDs - unique ME/F serials (and not taken(me, f), e.g. registry_taken), packed into one preallocated buffer; result dict (BiosError 15 if count INVALID)"""
+    if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+        raise BiosError("error: UID count (%s) INVALID!\n" % count, 15)
+    lap = timings_lap()
+    rng = random if seed is None else random.Random(seed)
+    template, me_slots, f_slots = uid_template(f7a)
+    size = len(template)
+    uids = bytearray(template) * count
+    me_seen, f_seen = set(), set()
+    serials = []
+    for i in range(count):
+        for attempt in range(uid_generate_attempts):
+            me, f = generate_serials(rng, f7a, int_serial, ev2, ev3, overrides)
+            if me not in me_seen and f not in f_seen and not (taken and taken(me.decode('utf-8'), f.decode('utf-8'))):
+                break
+        else:
+            raise BiosError("error: unable to generate unique UID serial (%s of %s)! serial space exhausted or overridden.\n" % (i + 1, count), 15)
+        me_seen.add(me)
+        f_seen.add(f)
+        serials.append((me.decode('utf-8'), f.decode('utf-8')))
+        base = i * size
+        for slot in me_slots:
+            uids[base + slot:base + slot + uid_serial_size] = me
+        for slot in f_slots:
+            uids[base + slot:base + slot + uid_serial_size] = f
+    lap('UID: generate')
+    return {'rev': 'F7A' if f7a else 'F7G', 'count': count, 'size': size, 'uids': uids, 'serials': serials}
+
+
+def write_uids(gen, path):
+    """write generate_uids result - directory (existing or trailing separator): one generate_uid_dir_file per UID, else single packed file; written paths"""
+    size = gen['size']
+    view = memoryview(gen['uids'])
+    if os.path.isdir(path) or path.endswith(os.sep):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        paths = [os.path.join(path, generate_uid_dir_file % f) for me, f in gen['serials']]
+        for uid_file in paths:
+            if os.path.exists(uid_file):
+                raise BiosError("error: generated UID file (%s) preexists! refuse to overwrite (nondestructive).\n" % uid_file, 1)
+        for i, uid_file in enumerate(paths):
+            with open(uid_file, 'wb') as gen_uid_of:
+                gen_uid_of.write(view[i * size:(i + 1) * size])
+        count_bytes(written=len(view))
+        return paths
+    if os.path.isfile(path) and path != generate_uid_default_file:
+        raise BiosError("error: generated UID file (%s) preexists! refuse to overwrite (nondestructive).\n" % path, 1)
+    with open(path, 'wb') as gen_uid_of:
+        gen_uid_of.write(view)
+    count_bytes(written=len(view))
+    return [path]
+
+
+def generate_uid(uid_file=None, f7a=False, int_serial=False, ev2=False, ev3=False, seed=None, overrides=None, taken=None):
+    """generate (pseudorandom) F7G/F7A UID - optionally to uid_file (refuse to overwrite except generate_uid_default_file); result dict"""
+    # nondestructive/conforming (refuse to overwrite)
+    #if uid_file and os.path.isfile(uid_file):
+    # destructive/nonconforming (overwrite generate_uid_default_file)
+    if uid_file and os.path.isfile(uid_file) and uid_file != generate_uid_default_file:
+        raise BiosError("error: generated UID file (%s) preexists! refuse to overwrite (nondestructive).\n" % uid_file, 1)
+    gen = generate_uids(1, f7a, int_serial, ev2, ev3, seed, overrides, taken)
+    uid = bytes(gen['uids'])
+    if uid_file:
+        with open(uid_file, 'wb') as gen_uid_of:
+            gen_uid_of.write(uid)
+        count_bytes(written=len(uid))
+    return {'rev': gen['rev'], 'uid': uid, 'uid_file': uid_file, 'size': len(uid), 'serial': gen['serials'][0]}
+
+
+def read_uid(uid_file):
+    """read UID file - bytes"""
+    if not os.path.isfile(uid_file):
+        raise BiosError("error: UID file (%s) does not exist!\n" % uid_file, 2)
+    lap = timings_lap()
+    with open(uid_file, 'rb') as uid_if:
+        uid = uid_if.read()
+    count_bytes(read=len(uid))
+    lap('UID: read')
+    return uid
+
+
+def backup_uid(src, uid_file=backup_uid_default_file, info=None, table=None):
+    """backup SOURCE UID to uid_file (refuse to overwrite) - result dict"""
+    if info is None:
+        info = analyze(src, table)
+    if not info['bios_uid']:
+        raise BiosError("%s: error: NO/NULL UID detected! nothing to backup.\n" % src, 8)
+    if os.path.isfile(uid_file):
+        raise BiosError("error: UID file (%s) preexists! refuse to overwrite (nondestructive).\n" % uid_file, 8)
+    lap = timings_lap()
+    with open(uid_file, 'wb') as uid_df:
+        uid_df.write(info['bios_uid'])
+    count_bytes(written=len(info['bios_uid']))
+    lap('UID: backup')
+    return {'src': src, 'uid_file': uid_file, 'bios_uid_offset': info['bios_uid_offset'], 'bios_uid_size': info['bios_uid_size']}
+
+
+def uid_serials(uid):
+    """ME/F serials of UID ($DMI) bytes (first record of each) - (me, f) str tuple, None if not found"""
+    dmi = parse_dmi(uid, limit=len(uid)) or {'records': []}
+    serials = dict((record['kind'], record['value']) for record in reversed(dmi['records']) if record['kind'] in ('me_serial', 'f_serial'))
+    return serials.get('me_serial'), serials.get('f_serial')
+
+
+def registry_open(path=registry_default_file):
+    """open (create) UID registry (SQLite) - connection; BiosError 24 if INVALID/UNSUPPORTED"""
+    # imported on demand - registry only
+    import sqlite3
+    try:
+        registry = sqlite3.connect(path)
+        registry.executescript("""\
+CREATE TABLE IF NOT EXISTS uids (kind TEXT NOT NULL, rev TEXT, me_serial TEXT, f_serial TEXT, uid_sha256 TEXT NOT NULL, src TEXT, uid_file TEXT, added REAL NOT NULL,
+                                 UNIQUE (kind, uid_sha256, src, uid_file));
+CREATE INDEX IF NOT EXISTS uids_me_serial ON uids (me_serial);
+CREATE INDEX IF NOT EXISTS uids_f_serial ON uids (f_serial);
+""")
+        version = registry.execute('PRAGMA user_version').fetchone()[0]
+        if version == 0:
+            registry.execute('PRAGMA user_version = %d' % registry_ver)
+        elif version != registry_ver:
+            raise sqlite3.DatabaseError('unsupported registry version (%s != %s)' % (version, registry_ver))
+    except sqlite3.Error as e:
+        raise BiosError("error: UID registry (%s) INVALID! | %s\n" % (path, e), 24)
+    return registry
+
+
+def registry_add(registry, kind, uids, rev=None, src=None, uid_files=None):
+    """record backed-up/generated (kind) UID bytes list in the registry (one transaction, duplicates ignored) - (me, f) serial tuple list"""
+    rows = []
+    serials = []
+    for i, uid in enumerate(uids):
+        me, f = uid_serials(uid)
+        serials.append((me, f))
+        uid_rev = rev or ('F7A' if (me or '').startswith('MEB') else 'F7G' if (me or '').startswith('MEC') else None)
+        rows.append((kind, uid_rev, me, f, hashlib.sha256(uid).hexdigest(), src, uid_files[i] if uid_files else None, time.time()))
+    with registry:
+        registry.executemany('INSERT OR IGNORE INTO uids VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    return serials
+
+
+def registry_taken(registry, me, f):
+    """ME or F serial already in the registry (indexed lookup) - bool"""
+    return registry.execute('SELECT 1 FROM uids WHERE me_serial = ? OR f_serial = ? LIMIT 1', (me, f)).fetchone() is not None
+
+
+def registry_find(registry, serial):
+    """registry records of ME or F serial - dict list (oldest first)"""
+    columns = ['kind', 'rev', 'me_serial', 'f_serial', 'uid_sha256', 'src', 'uid_file', 'added']
+    rows = registry.execute('SELECT %s FROM uids WHERE me_serial = ? OR f_serial = ? ORDER BY added' % ', '.join(columns), (serial, serial)).fetchall()
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def src_range(start, end, size):
+    """SOURCE byte range tuple (offset, byte size) - clamped to size bytes (slice semantics)"""
+    start, end = min(max(start, 0), size), min(max(end, 0), size)
+    return (start, max(end - start, 0))
+
+
+def build_bios(info, uid=None, remove=False):
+    """assemble (trimmed) BIOS from analyze() info - segment list of SOURCE byte range tuples (offset, byte size) and patch bytes, optionally injecting uid or removing UID"""
+    lap = timings_lap()
+    size = len(info['data'])
+    bios_offset, uid_offset, uid_size = info['bios_offset'], info['bios_uid_offset'], info['bios_uid_size']
+    build = {'segments': None, 'size': 0, 'uid_inject': None, 'uid_padding': 0}
+    # inject UID
+    if uid is not None and uid_offset is not None and uid_offset >= bios_offset:
+        # potentially inflate/pad uid
+        if uid_size > len(uid):
+            build['uid_padding'] = uid_size - len(uid)
+            uid += b'\xff' * build['uid_padding']
+        build['uid_inject'] = uid
+        head_size = uid_offset - bios_offset + len(uid)
+        if head_size > bios_size:
+            raise BiosError("""\
+error: injected BIOS greater than BIOS byte size! | %s > %s | %s extra bytes!
+error: CORRUPT or INVALID injected BIOS detected!
+""" % (head_size, bios_size, head_size - bios_size), 9)
+        tail_offset = uid_offset + len(uid)
+        build['segments'] = [src_range(bios_offset, uid_offset, size), uid, src_range(tail_offset, tail_offset + bios_size - head_size, size)]
+    # remove UID (inject blank UID)
+    elif remove and uid_offset is not None:
+        tail_offset = uid_offset + uid_size
+        build['segments'] = [src_range(bios_offset, uid_offset, size), b'\xff' * uid_size,
+                             src_range(tail_offset, tail_offset + bios_size - (uid_offset - bios_offset) - uid_size, size)]
+    # RAW BIOS
+    else:
+        build['segments'] = [src_range(bios_offset, bios_offset + bios_size, size)]
+    build['size'] = sum(segment[1] if isinstance(segment, tuple) else len(segment) for segment in build['segments'])
+    lap('trim: build')
+    return build
+
+
+def write_all(fd, data):
+    """write all data to file descriptor (partial writes)"""
+    view = memoryview(data)
+    count_bytes(written=len(view))
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def copy_range(src_fd, dest_fd, offset, size):
+    """copy SOURCE byte range to DESTINATION (file position) in the kernel (copy_file_range/sendfile) - buffered pread/write fallback; byte size copied"""
+    end = offset + size
+    while offset < end:
+        count = None
+        for method in copy_range_method_list[:]:
+            try:
+                if method == 'copy_file_range':
+                    count = os.copy_file_range(src_fd, dest_fd, end - offset, offset)
+                else:
+                    count = os.sendfile(dest_fd, src_fd, offset, end - offset)
+                count_bytes(written=count)
+                break
+            except OSError as e:
+                if e.errno not in copy_range_fallback_errno_list:
+                    raise
+                # unsupported (kernel/file system) - next method (list shared across threads)
+                try:
+                    copy_range_method_list.remove(method)
+                except ValueError:
+                    pass
+        if count is None:
+            chunk = os.pread(src_fd, min(end - offset, copy_chunk_size), offset)
+            write_all(dest_fd, chunk)
+            count = len(chunk)
+        # EOF
+        if not count:
+            break
+        offset += count
+    return size - (end - offset)
+
+
+def write_segments(dest_fd, segments, src_fd=None, data=None):
+    """write BIOS segment list to DESTINATION file descriptor - SOURCE byte ranges from src_fd (copy_range) or data, patches from userspace; byte size written (BiosError 10 if a SOURCE byte range is short - truncated/changing SOURCE)"""
+    written = 0
+    for segment in segments:
+        if not isinstance(segment, tuple):
+            write_all(dest_fd, segment)
+            count = size = len(segment)
+        elif src_fd is not None:
+            count, size = copy_range(src_fd, dest_fd, segment[0], segment[1]), segment[1]
+        else:
+            view = memoryview(data)[segment[0]:segment[0] + segment[1]]
+            write_all(dest_fd, view)
+            count, size = len(view), segment[1]
+        written += count
+        if count != size:
+            raise BiosError("""\
+error: SOURCE byte range (%s) short! | %s < %s | %s fewer bytes!
+error: SOURCE BIOS image truncated or changed while writing!
+""" % (hex(segment[0]) if isinstance(segment, tuple) else 'patch', count, size, size - count), 10)
+    return written
+
+
+def write_bios(dest, segments, src=None, data=None):
+    """write BIOS segment list to DESTINATION (refuse to overwrite) - SOURCE byte ranges from src file (copy_range) or data, patches from userspace; byte size written"""
+    if os.path.isfile(dest):
+        raise BiosError("error: DESTINATION BIOS image (%s) preexists! refuse to overwrite (nondestructive).\n" % dest, 11)
+    lap = timings_lap()
+    src_fd = os.open(src, os.O_RDONLY) if src is not None else None
+    try:
+        dest_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            return write_segments(dest_fd, segments, src_fd, data)
+        except BiosError:
+            # short (partial) DESTINATION - never left behind
+            os.remove(dest)
+            raise
+        finally:
+            os.close(dest_fd)
+            lap('write')
+    finally:
+        if src_fd is not None:
+            os.close(src_fd)
+
+
+def first_mismatch(a, b, np=None):
+    """first mismatching byte offset of equal byte size buffers known to differ (or -1) - NumPy (np) vectorized, else 4KB sector then byte compares"""
+    if np is not None:
+        diff = np.frombuffer(a, np.uint8) != np.frombuffer(b, np.uint8)
+        return int(diff.argmax()) if diff.any() else -1
+    a, b = bytes(a), bytes(b)
+    sector = flash_erase_size_list[0]
+    for start in range(0, len(a), sector):
+        if a[start:start + sector] != b[start:start + sector]:
+            return next(i for i in range(start, start + sector) if a[i] != b[i])
+    return -1
+
+
+def verify_bios(dest, segments, data, info=None):
+    """re-read DESTINATION and compare segment by segment against SOURCE data byte ranges/patches, then (info) mirrored blocks - result dict"""
+    try:
+        # imported on demand - optional (mismatching byte offset only; chunks compared as bytes)
+        import numpy as np
+    except ImportError:
+        np = None
+    lap = timings_lap()
+    verify = {'dest': dest, 'size': 0, 'mismatches': [], 'mirrors': [], 'numpy': np is not None, 'verified': False}
+    view = memoryview(data)
+    fd = os.open(dest, os.O_RDONLY)
+    try:
+        verify['size'] = os.fstat(fd).st_size
+        pos = 0
+        for segment in segments:
+            if isinstance(segment, tuple):
+                region, expected = 'SOURCE', view[segment[0]:segment[0] + segment[1]]
+            else:
+                region, expected = 'UID', memoryview(segment)
+            for offset in range(0, len(expected), verify_chunk_size):
+                chunk = expected[offset:offset + verify_chunk_size]
+                actual = os.pread(fd, len(chunk), pos + offset)
+                count_bytes(read=len(actual))
+                if len(actual) != len(chunk):
+                    verify['mismatches'].append((region, pos + offset + len(actual)))
+                    break
+                # bytes compare (memcmp) - mismatching byte located only on a mismatch
+                if actual != chunk.tobytes():
+                    verify['mismatches'].append((region, pos + offset + first_mismatch(actual, chunk, np)))
+                    break
+            pos += len(expected)
+        if verify['size'] != pos:
+            verify['mismatches'].append(('SIZE', min(verify['size'], pos)))
+        # mirrored blocks (detected block and block + mirror delta)
+        if info is not None and info['bios_offset'] >= 0:
+            for name, offset_key, value_key, delta in mirror_list:
+                if info[offset_key] is None:
+                    continue
+                offset = info[offset_key] - info['bios_offset']
+                size = bios_date_size if value_key is None else len(info[value_key])
+                if offset < 0 or offset + delta + size > verify['size']:
+                    continue
+                block, mirror = os.pread(fd, size, offset), os.pread(fd, size, offset + delta)
+                verify['mirrors'].append((name, offset, offset + delta, block == mirror))
+    finally:
+        os.close(fd)
+    verify['verified'] = not verify['mismatches'] and all(mirror[3] for mirror in verify['mirrors'])
+    lap('verify')
+    return verify
+
+
+def bios_regions(info):
+    """known regions of analyze() info in BIOS (trimmed) offsets - [(name, start, end)] (UID, mirrored version/EC/date blocks)"""
+    regions = []
+    bios_offset = info['bios_offset']
+    if info['bios_uid_offset'] is not None:
+        start = info['bios_uid_offset'] - bios_offset
+        regions.append(('UID', start, start + max(info['bios_uid_size'], len(bios_uid_offset_str))))
+    for name, offset_key, value_key, delta in mirror_list:
+        if info[offset_key] is None:
+            continue
+        start = info[offset_key] - bios_offset
+        size = bios_date_size if value_key is None else len(info[value_key])
+        regions += [(name, start, start + size), (name + ' (mirror)', start + delta, start + delta + size)]
+    return regions
+
+
+def region_index(info):
+    """named region index of analyze() info (built once - kept in info['regions']) - {name: region dict (name, offset, size, mirror of, sha256 (lazy, region_sha256))}; SOURCE offsets"""
+    if info.get('regions') is None:
+        regions = {}
+        size, bios_offset = info['size'], info['bios_offset']
+
+        def add(name, offset, length, mirror=None):
+            if offset is not None and 0 <= offset and 0 < length and offset + length <= size:
+                regions[name] = {'name': name, 'offset': offset, 'size': length, 'mirror': mirror, 'sha256': None}
+
+        if bios_offset >= 0:
+            # RELEASE capsule header / TRIMMED BIOS window
+            add('header', 0x0, bios_offset)
+            add('bios', bios_offset, min(bios_size, size - bios_offset))
+            if info['ec_rev_offset'] is not None:
+                ec_offset = info['ec_rev_offset'] - (info['ec_rev_offset'] - bios_offset) % ec_firmware_size
+                add('ec', ec_offset, ec_firmware_size)
+                add('ec-mirror', ec_offset + ec_firmware_size, ec_firmware_size, 'ec')
+        if info['bios_uid_offset'] is not None and info['bios_uid_size'] >= 0:
+            add('uid', info['bios_uid_offset'], info['bios_uid_size'])
+        for name, offset_key, value_key, delta in mirror_list:
+            if info[offset_key] is not None:
+                name = name.lower().replace(' ', '-')
+                length = bios_date_size if value_key is None else len(info[value_key])
+                add(name, info[offset_key], length)
+                add(name + '-mirror', info[offset_key] + delta, length, name)
+        info['regions'] = regions
+    return info['regions']
+
+
+def read_region(info, name):
+    """region bytes - memoryview slice of mapped data, else positional read (os.pread) of SOURCE file"""
+    region = region_index(info)[name]
+    if info.get('data') is not None and not isinstance(info['data'], SparseImage):
+        return memoryview(info['data'])[region['offset']:region['offset'] + region['size']]
+    fd = os.open(info['src'], os.O_RDONLY)
+    try:
+        data = os.pread(fd, region['size'], region['offset'])
+    finally:
+        os.close(fd)
+    count_bytes(read=len(data))
+    return data
+
+
+def region_sha256(info, name):
+    """region SHA-256 hex digest - computed on first use (reads only the region)"""
+    region = region_index(info)[name]
+    if region['sha256'] is None:
+        region['sha256'] = hashlib.sha256(read_region(info, name)).hexdigest()
+    return region['sha256']
+
+
+def preset_analysis(path, table=None):
+    """analyze SOURCE file from positional reads (os.pread) around preset offsets only (UNTRIMMED RELEASE layouts of bios_offset_list/TRIMMED layout) - analyze_bios info (data: SparseImage), or None if no layout matches with every region_preset_key_list field detected"""
+    if table is None:
+        table = sig_table
+    size = os.path.getsize(path)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        head = os.pread(fd, 0x10, 0x0)
+        # UID offset is BIOS-relative (rel_bios_uid_offset_list - bios_offset_list) in every layout
+        uid_offset = rel_bios_uid_offset_list[0][0] - bios_offset_list[0][0]
+        for bios_offset in [drb_offset for drb_offset, drb_str in bios_offset_list] if head[:len(rel_header)] == rel_header else [0x0]:
+            image = SparseImage(size)
+            image.add(0x0, head)
+            # BIOS header, BIOS offset signature and preset (first) blocks - BIOS-relative
+            for offset, length in [(0x0, 0x10), (bios_ver_offset_list[0], 0x10), (ec_rev_offset_list[0], 0x10), (ec_date_offset_list[0], 0x10),
+                                   (bios_date_offset_list[0], 0x10), (uid_offset, dmi_max_size)]:
+                start = max(bios_offset + offset - region_preset_margin, 0)
+                image.add(start, os.pread(fd, bios_offset + offset + length + region_preset_margin - start, start))
+            count_bytes(read=sum(len(piece[1]) for piece in image.pieces))
+            info = analyze_bios(image, size, table, dict((sig, image.find(sig)) for sig in table_sigs(table)))
+            if not info['invalid'] and info['bios_offset'] == bios_offset and (info['release'] if bios_offset else info['trimmed']) and \
+                    all(info[key] is not None for key in region_preset_key_list):
+                return info
+    finally:
+        os.close(fd)
+    return None
+
+
+def locate_regions(path, names=(), table=None, cache=None):
+    """region index of SOURCE file reading only small blocks - analysis cache (stat) hit, else preset offsets validated by positional reads, else full analysis (scan); (info, method)"""
+    lap = timings_lap()
+    if table is None:
+        table = sig_table
+    info, method = None, None
+    if cache == 'stat':
+        info, method = cache_load(cache_key(path, None, cache, table)[0]), 'cache'
+        if info is not None:
+            if info['bios_offset_fallback'] is not None:
+                info['bios_offset_fallback'] = [tuple(fallback) for fallback in info['bios_offset_fallback']]
+            null_uid = info.pop('bios_uid_null')
+            info['src'], info['bios_uid'], info['data'] = path, None, None
+            # UID - positional read of the indexed region
+            if not null_uid and 'uid' in region_index(info):
+                info['bios_uid'] = read_region(info, 'uid')
+    if info is None:
+        info, method = preset_analysis(path, table), 'preset'
+        if info is not None:
+            info['data'] = None
+    if info is not None:
+        info['src'] = path
+        if [name for name in names if name not in region_index(info)]:
+            info = None
+    if info is None:
+        info, method = analyze(path, table, cache), 'scan'
+    lap('regions: locate (%s)' % method)
+    return info, method
+
+
+def locate_uid(src, table=None, cache=None):
+    """locate SOURCE UID reading only the UID ($DMI) block - analysis cache or preset UID offsets (locate_regions) validated as a $DMI record stream, full scan on a miss; (info, method: cache/preset/scan)"""
+    info, method = locate_regions(src, ('uid',), table, cache)
+    if method != 'scan' and info['bios_uid'] is not None:
+        dmi = parse_dmi(info['bios_uid'], limit=len(info['bios_uid']))
+        # malformed $DMI (sized by erased bytes) - confirm by full scan
+        if dmi is None or not dmi['valid']:
+            info, method = analyze(src, table, cache), 'scan'
+    return info, method
+
+
+def library_index(directory, table=None, cache=None):
+    """index release BIOS library directory (archive_member_pattern files) - only new/changed (size/mtime) files analyzed (locate_regions: preset offsets, else full analyze() scan if any library_detect_keys field undetected), index kept in the analysis cache directory (complete entries only); (entry list, refreshed count)"""
+    lap = timings_lap()
+    if table is None:
+        table = sig_table
+    index_file = cache_path('library-' + hashlib.sha256(os.path.realpath(directory).encode('utf-8')).hexdigest())
+    # stale index (version/signature table) - rebuilt
+    ident = [library_ver, ver, hashlib.sha256(repr(sorted(table.items())).encode('utf-8')).hexdigest()]
+    try:
+        with open(index_file) as index_if:
+            loaded = json.load(index_if)
+        files = loaded['files'] if loaded.get('ident') == ident else {}
+    except (EnvironmentError, ValueError, KeyError, AttributeError):
+        files = {}
+    entries, refreshed = [], 0
+    for path in sorted(glob.glob(os.path.join(directory, archive_member_pattern))):
+        name = os.path.basename(path)
+        st = os.stat(path)
+        entry = files.get(name)
+        if entry is None or entry['size'] != st.st_size or entry['mtime_ns'] != st.st_mtime_ns:
+            info, method = locate_regions(path, (), table, cache)
+            if method != 'scan' and any(info[key] is None for key in library_detect_keys):
+                info = analyze(path, table, cache)
+            entry = dict((key, info[key]) for key in library_entry_keys)
+            entry.update(name=name, mtime_ns=st.st_mtime_ns, invalid=bool(entry['invalid']))
+            refreshed += 1
+        entries.append(entry)
+    # incomplete entries (undetected field) not persisted - re-analyzed next run
+    complete = dict((entry['name'], entry) for entry in entries if all(entry[key] is not None for key in library_detect_keys))
+    if complete != files:
+        try:
+            if not os.path.isdir(os.path.dirname(index_file)):
+                os.makedirs(os.path.dirname(index_file))
+            fd, tmp_file = tempfile.mkstemp(prefix='.', suffix='.json', dir=os.path.dirname(index_file))
+            with os.fdopen(fd, 'w') as index_of:
+                json.dump({'ident': ident, 'directory': os.path.realpath(directory), 'files': complete}, index_of, indent=1, sort_keys=True)
+            os.replace(tmp_file, index_file)
+        except EnvironmentError:
+            pass
+    lap('library: index')
+    return entries, refreshed
+
+
+def library_resolve(entries, query):
+    """resolve release query (latest-f7g/latest-f7a/latest-PREFIX, BIOS version or file name) to a library entry - None if not found"""
+    query = query.lower()
+    valid = [entry for entry in entries if entry['bios_ver'] and not entry['invalid']]
+    if query.startswith('latest'):
+        prefix = query[len('latest'):].lstrip('-')
+        matches = [entry for entry in valid if entry['bios_ver'].lower().startswith(prefix)]
+        return max(matches, key=lambda entry: (entry['bios_ver'], entry['name'])) if matches else None
+    for entry in valid:
+        if query == entry['bios_ver'].lower():
+            return entry
+    for entry in entries:
+        if query in (entry['name'].lower(), os.path.splitext(entry['name'])[0].lower()):
+            return entry
+    return None
+
+
+def diff_bios(info, other, gap=diff_merge_gap):
+    """diff two analyze() infos aligned at their BIOS offsets (untrimmed vs trimmed) - changed ranges (merged across gap equal bytes) annotated with known regions; result dict"""
+    for image in info, other:
+        if image['bios_offset'] < 0:
+            raise BiosError("%s: error: CORRUPT or INVALID BIOS detected! | %s fewer bytes!\n" % (image['src'], abs(image['bios_offset'])), 7)
+    lap = timings_lap()
+    a = memoryview(info['data'])[info['bios_offset']:info['bios_offset'] + bios_size]
+    b = memoryview(other['data'])[other['bios_offset']:other['bios_offset'] + bios_size]
+    size = min(len(a), len(b))
+    try:
+        # imported on demand - optional
+        import numpy as np
+    except ImportError:
+        np = None
+    ranges = []
+    changed = 0
+    if np is not None:
+        index = np.flatnonzero(np.frombuffer(a[:size], np.uint8) != np.frombuffer(b[:size], np.uint8))
+        changed = int(index.size)
+        if changed:
+            breaks = np.flatnonzero(np.diff(index) > gap + 1)
+            starts = index[np.concatenate(([0], breaks + 1))]
+            ends = index[np.concatenate((breaks, [changed - 1]))] + 1
+            ranges = [[int(start), int(end)] for start, end in zip(starts, ends)]
+    else:
+        # equal blocks compare as bytes (memcmp) - changed blocks XOR (big int) and scan for nonzero byte runs
+        for offset in range(0, size, diff_block_size):
+            x, y = a[offset:offset + diff_block_size].tobytes(), b[offset:offset + diff_block_size].tobytes()
+            if x == y:
+                continue
+            xor = (int.from_bytes(x, 'big') ^ int.from_bytes(y, 'big')).to_bytes(len(x), 'big')
+            changed += len(xor) - xor.count(0)
+            for run in re.finditer(b'[^\x00]+', xor):
+                start, end = offset + run.start(), offset + run.end()
+                if ranges and start - ranges[-1][1] <= gap:
+                    ranges[-1][1] = end
+                else:
+                    ranges.append([start, end])
+    # differing BIOS region byte sizes - tail is changed
+    if len(a) != len(b):
+        ranges.append([size, max(len(a), len(b))])
+        changed += max(len(a), len(b)) - size
+    regions = bios_regions(info) + [region for region in bios_regions(other) if region not in bios_regions(info)]
+    lap('diff')
+    return {'src': info['src'], 'other': other['src'], 'bios_offset': info['bios_offset'], 'other_bios_offset': other['bios_offset'],
+            'size': size, 'changed': changed, 'numpy': np is not None,
+            'ranges': [(start, end, sorted(set(name for name, rstart, rend in regions if rstart < end and start < rend))) for start, end in ranges]}
+
+
+def assemble_bios(segments, data):
+    """assemble BIOS segment list (SOURCE byte ranges of data, patches) in memory - bytearray"""
+    lap = timings_lap()
+    view = memoryview(data)
+    bios = bytearray()
+    for segment in segments:
+        bios += view[segment[0]:segment[0] + segment[1]] if isinstance(segment, tuple) else segment
+    lap('assemble')
+    return bios
+
+
+def delta_blocks(target, base, mode='auto'):
+    """changed erase blocks of target vs base (current chip contents) - [(offset, byte size, erase only)]; mode 4k/64k or auto (cheaper estimated erase/program time per 64KB block)"""
+    lap = timings_lap()
+    sector, block = flash_erase_size_list
+    target, base = memoryview(target), memoryview(base)
+    blocks = []
+    for offset in range(0, len(target), block):
+        if target[offset:offset + block].tobytes() == base[offset:offset + block].tobytes():
+            continue
+        sectors = [s for s in range(offset, min(offset + block, len(target)), sector) if target[s:s + sector].tobytes() != base[s:s + sector].tobytes()]
+        if mode == '4k' or (mode == 'auto' and flash_time(sector, len(sectors)) < flash_time(block)):
+            blocks += [(s, sector) for s in sectors]
+        else:
+            blocks.append((offset, min(block, len(target) - offset)))
+    # erased (0xFF) target blocks need no programming
+    blocks = [(offset, size, target[offset:offset + size].tobytes() == b'\xff' * size) for offset, size in blocks]
+    lap('delta: blocks')
+    return blocks
+
+
+def flash_time(size, count=1):
+    """estimated (typical) erase + program time (ms) of count erase blocks of byte size"""
+    return count * (flash_erase_ms[size] + size // flash_page_size * flash_page_program_ms)
+
+
+def write_delta(dest, target, base, blocks):
+    """write delta patch (changed erase blocks of target vs base) to DESTINATION (refuse to overwrite) - byte size written"""
+    if os.path.isfile(dest):
+        raise BiosError("error: DESTINATION delta (%s) preexists! refuse to overwrite (nondestructive).\n" % dest, 11)
+    lap = timings_lap()
+    view = memoryview(target)
+    with open(dest, 'wb') as delta_of:
+        delta_of.write(struct.pack(delta_header_format, delta_magic, delta_ver, len(target), len(blocks),
+                                   hashlib.sha256(base).digest(), hashlib.sha256(target).digest()))
+        for offset, size, erase in blocks:
+            delta_of.write(struct.pack(delta_entry_format, offset, size, erase))
+            if not erase:
+                delta_of.write(view[offset:offset + size])
+        count_bytes(written=delta_of.tell())
+        lap('write')
+        return delta_of.tell()
+
+
+def write_layout(path, blocks):
+    """write (flashrom) layout list of delta erase blocks (refuse to overwrite) - start:end (inclusive) name per line"""
+    if os.path.isfile(path):
+        raise BiosError("error: DESTINATION layout list (%s) preexists! refuse to overwrite (nondestructive).\n" % path, 11)
+    with open(path, 'w') as layout_of:
+        for offset, size, erase in blocks:
+            layout_of.write('%08x:%08x %s_%08x\n' % (offset, offset + size - 1, 'sector' if size == flash_erase_size_list[0] else 'block', offset))
+
+
+def apply_delta(base, delta_file):
+    """apply delta patch to base (current chip contents) - target bytearray (base/target SHA-256 checked)"""
+    lap = timings_lap()
+    with open(delta_file, 'rb') as delta_if:
+        delta = delta_if.read()
+    count_bytes(read=len(delta))
+    header_size = struct.calcsize(delta_header_format)
+    entry_size = struct.calcsize(delta_entry_format)
+    try:
+        magic, version, size, count, base_sha256, target_sha256 = struct.unpack_from(delta_header_format, delta)
+    except struct.error:
+        magic = version = None
+    if magic != delta_magic or version != delta_ver:
+        raise BiosError("error: delta (%s) INVALID or UNSUPPORTED!\n" % delta_file, 20)
+    if len(base) != size or hashlib.sha256(base).digest() != base_sha256:
+        raise BiosError("error: delta (%s) base mismatch! (not made against this chip image)\n" % delta_file, 20)
+    target = bytearray(base)
+    pos = header_size
+    try:
+        for i in range(count):
+            offset, block_size, erase = struct.unpack_from(delta_entry_format, delta, pos)
+            pos += entry_size
+            block = b'\xff' * block_size if erase else delta[pos:pos + block_size]
+            if not erase:
+                pos += block_size
+            if len(block) != block_size or offset + block_size > size:
+                raise struct.error('truncated')
+            target[offset:offset + block_size] = block
+    except struct.error:
+        raise BiosError("error: delta (%s) CORRUPT! truncated or out of range block.\n" % delta_file, 20)
+    if hashlib.sha256(target).digest() != target_sha256:
+        raise BiosError("error: delta (%s) CORRUPT! target SHA-256 mismatch.\n" % delta_file, 20)
+    lap('delta: apply')
+    return target
+
+
+def erased_map(data, block=erased_block_size):
+    """erased (0xFF) block map of data - merged [(offset, byte size)] runs of whole erased blocks (erased chunks compared whole, memcmp)"""
+    lap = timings_lap()
+    view = memoryview(data)
+    erased_chunk = b'\xff' * erased_chunk_size
+    runs = []
+
+    def add(offset, size):
+        if runs and runs[-1][0] + runs[-1][1] == offset:
+            runs[-1] = (runs[-1][0], runs[-1][1] + size)
+        else:
+            runs.append((offset, size))
+
+    for chunk_offset in range(0, len(view), erased_chunk_size):
+        chunk = view[chunk_offset:chunk_offset + erased_chunk_size]
+        if chunk == erased_chunk[:len(chunk)]:
+            add(chunk_offset, len(chunk))
+            continue
+        for offset in range(0, len(chunk), block):
+            piece = chunk[offset:offset + block]
+            if piece == erased_chunk[:len(piece)]:
+                add(chunk_offset + offset, len(piece))
+    lap('compact: erased map')
+    return runs
+
+
+def write_compact(dest, data, layout='packed'):
+    """write data as compact container to DESTINATION (refuse to overwrite) - header, erased run table, non-erased bytes (packed, or sparse at image offsets); result dict"""
+    if os.path.isfile(dest):
+        raise BiosError("error: DESTINATION (%s) preexists! refuse to overwrite (nondestructive).\n" % dest, 11)
+    runs = erased_map(data)
+    lap = timings_lap()
+    view = memoryview(data)
+    data_offset = struct.calcsize(compact_header_format) + len(runs) * struct.calcsize(compact_run_format)
+    # sparse - erased runs (block multiples) line up with file system blocks
+    if layout == 'sparse':
+        data_offset = -(-data_offset // erased_block_size) * erased_block_size
+    head = struct.pack(compact_header_format, compact_magic, compact_ver, compact_layout_list.index(layout), len(view), erased_block_size, len(runs),
+                       data_offset, hashlib.sha256(view).digest())
+    head += b''.join(struct.pack(compact_run_format, offset, size) for offset, size in runs)
+    fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        write_all(fd, head)
+        os.lseek(fd, data_offset, os.SEEK_SET)
+        start = 0
+        for offset, size in runs + [(len(view), 0)]:
+            write_all(fd, view[start:offset])
+            start = offset + size
+            if layout == 'sparse':
+                os.lseek(fd, data_offset + start, os.SEEK_SET)
+        # trailing erased run - hole up to the image byte size
+        if layout == 'sparse':
+            os.ftruncate(fd, data_offset + len(view))
+        st = os.fstat(fd)
+    finally:
+        os.close(fd)
+    lap('compact: write')
+    return {'dest': dest, 'layout': layout, 'size': len(view), 'runs': len(runs), 'erased': sum(size for offset, size in runs),
+            'file_size': st.st_size, 'disk_size': st.st_blocks * 512}
+
+
+def expand_compact(data, name=None):
+    """expand compact container bytes back to the image (byte-exact, SHA-256 checked) - bytearray"""
+    lap = timings_lap()
+    view = memoryview(data)
+    try:
+        magic, version, layout, size, block, count, data_offset, digest = struct.unpack_from(compact_header_format, view)
+    except struct.error:
+        magic = version = None
+    if magic != compact_magic or version != compact_ver or not 0 <= layout < len(compact_layout_list):
+        raise BiosError("error: compact container (%s) INVALID or UNSUPPORTED!\n" % name, 27)
+    runs = [struct.unpack_from(compact_run_format, view, struct.calcsize(compact_header_format) + i * struct.calcsize(compact_run_format)) for i in range(count)]
+    # erased runs already in place
+    image = bytearray(b'\xff') * size
+    pos = data_offset
+    start = 0
+    for offset, run_size in runs + [(size, 0)]:
+        if offset < start or offset > size:
+            raise BiosError("error: compact container (%s) CORRUPT! out of range erased run.\n" % name, 27)
+        src = pos if compact_layout_list[layout] == 'packed' else data_offset + start
+        if src + offset - start > len(view):
+            raise BiosError("error: compact container (%s) CORRUPT! truncated.\n" % name, 27)
+        image[start:offset] = view[src:src + offset - start]
+        pos += offset - start
+        start = offset + run_size
+    if hashlib.sha256(image).digest() != digest:
+        raise BiosError("error: compact container (%s) CORRUPT! image SHA-256 mismatch.\n" % name, 27)
+    lap('compact: expand')
+    return image
+
+
+def trim(src, dest, uid=None, remove=False, info=None, table=None, verify=False):
+    """dynamically trim SOURCE BIOS image to DESTINATION (0x1000000) - optionally inject uid (bytes) or remove UID, verify DESTINATION (result['verify']); result dict"""
+    if info is None:
+        info = analyze(src, table)
+    if info['bios_offset'] < 0:
+        raise BiosError("%s: error: CORRUPT or INVALID BIOS detected! | %s fewer bytes!\n" % (src, abs(info['bios_offset'])), 7)
+    build = build_bios(info, uid, remove)
+    if build['size'] != bios_size:
+        raise BiosError("""\
+%s: error: BIOS byte size mismatch! | %s != %s | %s byte size difference!
+%s: error: CORRUPT or INVALID BIOS detected!
+""" % (src, build['size'], bios_size, build['size'] - bios_size, src), 10)
+    # archive members from memory (no SOURCE file)
+    size = write_bios(dest, build['segments'], None if info.get('member') else src, info['data'])
+    result = {'src': src, 'dest': dest, 'size': size, 'bios_offset': info['bios_offset'],
+              'bios_uid_offset': info['bios_uid_offset'], 'uid_injected': build['uid_inject'] is not None,
+              'uid_padding': build['uid_padding'], 'uid_removed': bool(remove and build['uid_inject'] is None and info['bios_uid_offset'] is not None),
+              'invalid': bool(info['invalid'])}
+    if verify:
+        result['verify'] = verify_bios(dest, build['segments'], info['data'], info)
+    return result
+
+
+def inject_uid(src, dest, uid_file=backup_uid_default_file, info=None, table=None, verify=False):
+    """trim SOURCE BIOS image to DESTINATION and inject UID from uid_file - result dict"""
+    return trim(src, dest, uid=read_uid(uid_file), info=info, table=table, verify=verify)
+
+
+def remove_uid(src, dest, info=None, table=None, verify=False):
+    """trim SOURCE BIOS image to DESTINATION and remove ("scrub") UID - result dict"""
+    return trim(src, dest, remove=True, info=info, table=table, verify=verify)
+
+
+def split_uids(uid):
+    """split packed UID file (back-to-back equal byte size $DMI record streams, e.g. generate_uids) - bytes list"""
+    records = []
+    offset = 0
+    view = memoryview(uid)
+    while offset < len(uid):
+        dmi = parse_dmi(view, offset, len(uid) - offset)
+        if dmi is None or not dmi['valid']:
+            return [uid]
+        records.append(uid[offset:offset + dmi['size']])
+        offset += dmi['size']
+    if len(records) > 1 and len(set(len(record) for record in records)) == 1:
+        return records
+    return [uid]
+
+
+def read_uids(uid_paths):
+    """read UID files, directories (regular files, sorted) and packed UID files - list of (name, uid bytes)"""
+    uids = []
+    for uid_path in uid_paths:
+        if os.path.isdir(uid_path):
+            uid_files = [os.path.join(uid_path, name) for name in sorted(os.listdir(uid_path)) if os.path.isfile(os.path.join(uid_path, name))]
+        else:
+            uid_files = [uid_path]
+        for uid_file in uid_files:
+            name = os.path.splitext(os.path.basename(uid_file))[0]
+            records = split_uids(read_uid(uid_file))
+            if len(records) == 1:
+                uids.append((name, records[0]))
+            else:
+                uids += [('%s-%04d' % (name, i + 1), record) for i, record in enumerate(records)]
+    return uids
+
+
+def clone_file(src_fd, dest_fd, size):
+    """clone SOURCE file to (empty) DESTINATION - reflink (FICLONE) where supported, copy_range otherwise; True if reflinked"""
+    for method in clone_method_list[:]:
+        # imported on demand - Linux only
+        import fcntl
+        try:
+            fcntl.ioctl(dest_fd, ficlone, src_fd)
+            return True
+        except OSError as e:
+            if e.errno not in clone_fallback_errno_list:
+                raise
+            # unsupported (file system) - copy (list shared across threads)
+            try:
+                clone_method_list.remove(method)
+            except ValueError:
+                pass
+    copy_range(src_fd, dest_fd, 0, size)
+    return False
+
+
+def inject_uids(src, dest_dir, uids, info=None, table=None, verify=False):
+    """trim SOURCE BIOS image once (UID removed) and clone it to dest_dir per (name, uid bytes), patching only the UID region (optionally verified) - result dict list"""
+    if info is None:
+        info = analyze(src, table)
+    bios_offset, uid_offset = info['bios_offset'], info['bios_uid_offset']
+    if bios_offset < 0:
+        raise BiosError("%s: error: CORRUPT or INVALID BIOS detected! | %s fewer bytes!\n" % (src, abs(bios_offset)), 7)
+    if uid_offset is None or uid_offset < bios_offset:
+        raise BiosError("%s: error: UID offset not detected! nothing to inject.\n" % src, 16)
+    base = build_bios(info, remove=True)
+    if base['size'] != bios_size:
+        raise BiosError("""\
+%s: error: BIOS byte size mismatch! | %s != %s | %s byte size difference!
+%s: error: CORRUPT or INVALID BIOS detected!
+""" % (src, base['size'], bios_size, base['size'] - bios_size, src), 10)
+    # DESTINATION offset of the UID region
+    patch_offset = uid_offset - bios_offset
+    jobs = []
+    for name, uid in uids:
+        dest = os.path.join(dest_dir, inject_uids_dest_file % (info['bios_ver'] or 'UNKNOWN', name))
+        if os.path.exists(dest) or dest in [job[0] for job in jobs]:
+            raise BiosError("error: DESTINATION BIOS image (%s) preexists! refuse to overwrite (nondestructive).\n" % dest, 11)
+        head_size = patch_offset + max(len(uid), info['bios_uid_size'])
+        if head_size > bios_size:
+            raise BiosError("""\
+error: injected BIOS greater than BIOS byte size! | %s > %s | %s extra bytes!
+error: CORRUPT or INVALID injected BIOS detected!
+""" % (head_size, bios_size, head_size - bios_size), 9)
+        # potentially inflate/pad uid
+        padding = max(info['bios_uid_size'] - len(uid), 0)
+        jobs.append((dest, name, uid + b'\xff' * padding, padding))
+    if not os.path.isdir(dest_dir):
+        os.makedirs(dest_dir)
+    results = []
+    lap = timings_lap()
+    base_fd, base_path = tempfile.mkstemp(prefix='.jupiter-bios-', dir=dest_dir)
+    try:
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            write_segments(base_fd, base['segments'], src_fd)
+        finally:
+            os.close(src_fd)
+        lap('write')
+        for dest, name, uid, padding in jobs:
+            lap = timings_lap()
+            dest_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            try:
+                cloned = clone_file(base_fd, dest_fd, bios_size)
+                os.lseek(dest_fd, patch_offset, os.SEEK_SET)
+                write_all(dest_fd, uid)
+            finally:
+                os.close(dest_fd)
+            lap('UID: inject (clone)')
+            results.append({'src': src, 'dest': dest, 'uid': name, 'size': bios_size, 'bios_offset': bios_offset,
+                            'bios_uid_offset': uid_offset, 'uid_size': len(uid), 'uid_padding': padding, 'cloned': cloned,
+                            'invalid': bool(info['invalid'])})
+            if verify:
+                results[-1]['verify'] = verify_bios(dest, build_bios(info, uid)['segments'], info['data'], info)
+    finally:
+        os.close(base_fd)
+        os.remove(base_path)
+    return results
+
+
+def archive_kind(head):
+    """archive kind of SOURCE head bytes (archive_magic_list) - zip/tar.gz/tar.bz2/tar.xz/tar or None"""
+    for offset, magic, kind in archive_magic_list:
+        if head[offset:offset + len(magic)] == magic:
+            return kind
+    return None
+
+
+class ArchiveStream(object):
+    """read-only file object - (already read) head bytes, then the rest of the underlying (non-seekable) stream"""
+
+    def __init__(self, head, f):
+        self.head = head
+        self.f = f
+
+    def read(self, size=-1):
+        if not self.head:
+            return self.f.read(size)
+        if size is None or size < 0:
+            data, self.head = self.head + self.f.read(), b''
+        else:
+            data, self.head = self.head[:size], self.head[size:]
+        return data
+
+
+def archive_members(src, pattern=archive_member_pattern, f=None):
+    """read pattern (*_sign.fd) members of SOURCE archive file, stdin (-) or (non-seekable) stream f from the decompression stream (never extracted to disk) - yields (member name, bytes)"""
+    # imported on demand - archive only
+    import fnmatch
+    import io
+    import tarfile
+    import zipfile
+    seekable = f is None and src != '-'
+    if f is None:
+        f = sys.stdin.buffer if src == '-' else open(src, 'rb')
+    try:
+        head = f.read(archive_head_size)
+        try:
+            if archive_kind(head) == 'zip':
+                # central directory at the end - streams buffered in memory (seekable)
+                archive = zipfile.ZipFile(f if seekable else io.BytesIO(head + f.read()))
+                for member in archive.infolist():
+                    if not member.filename.endswith('/') and fnmatch.fnmatch(os.path.basename(member.filename), pattern):
+                        lap = timings_lap()
+                        with archive.open(member) as member_if:
+                            data = member_if.read()
+                        count_bytes(read=len(data))
+                        lap('archive: read/decompress')
+                        yield member.filename, data
+            else:
+                # sequential (stream) - compression autodetected
+                archive = tarfile.open(fileobj=ArchiveStream(head, f), mode='r|*')
+                for member in archive:
+                    if member.isfile() and fnmatch.fnmatch(os.path.basename(member.name), pattern):
+                        lap = timings_lap()
+                        data = archive.extractfile(member).read()
+                        count_bytes(read=len(data))
+                        lap('archive: read/decompress')
+                        yield member.name, data
+        except (tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+            raise BiosError("%s: error: INVALID or UNSUPPORTED archive! | %s\n" % (src, e), 22)
+    finally:
+        if seekable:
+            f.close()
+
+
+def analyze_archive(src, dest_dir=None, uid=None, remove=False, table=None, verify=False, pattern=archive_member_pattern, f=None):
+    """analyze pattern members of SOURCE archive or stdin (-) in memory, with dest_dir also trim each (optionally injecting uid or removing UID) - yields result dicts (src, info, trim result or BiosError)"""
+    op = 'injected' if uid is not None else 'removed' if remove else 'trimmed'
+    for name, data in archive_members(src, pattern, f):
+        info = analyze_bios(data, len(data), table)
+        info.update(src='%s:%s' % (src, name), data=data, member=name)
+        result = {'src': info['src'], 'info': info, 'trim': None, 'error': None}
+        if dest_dir is not None:
+            if not os.path.isdir(dest_dir):
+                os.makedirs(dest_dir)
+            dest = os.path.join(dest_dir, archive_dest_file % (os.path.splitext(os.path.basename(name))[0], op))
+            try:
+                result['trim'] = trim(info['src'], dest, uid, remove, info, verify=verify)
+            except BiosError as e:
+                result['error'] = e
+        yield result
+
+
+class SparseImage(object):
+    """captured byte ranges of a streamed BIOS image (bounded) - slicing/find over captured bytes only (analyze_bios data stand-in)"""
+
+    def __init__(self, size=0):
+        # sorted, merged [offset, bytearray] list
+        self.pieces = []
+        self.size = size
+
+    def add(self, offset, data):
+        start, end = offset, offset + len(data)
+        keep, merge = [], []
+        for piece in self.pieces:
+            (merge if piece[0] <= end and start <= piece[0] + len(piece[1]) else keep).append(piece)
+        start = min([start] + [piece[0] for piece in merge])
+        end = max([end] + [piece[0] + len(piece[1]) for piece in merge])
+        merged = bytearray(end - start)
+        for piece_offset, piece_data in merge + [(offset, data)]:
+            merged[piece_offset - start:piece_offset - start + len(piece_data)] = piece_data
+        self.pieces = sorted(keep + [[start, merged]])
+        self.size = max(self.size, end)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            piece = self[key:key + 1]
+            if not piece:
+                raise IndexError('byte not captured (%s)' % key)
+            return piece[0]
+        start, stop, step = key.indices(self.size)
+        for offset, data in self.pieces:
+            if offset <= start < offset + len(data):
+                return bytes(data[start - offset:stop - offset])
+        return b''
+
+    def find(self, sub, start=0, end=None):
+        end = self.size if end is None else end
+        for offset, data in self.pieces:
+            found = data.find(sub, max(start - offset, 0), max(end - offset, 0))
+            if found >= 0:
+                return offset + found
+        return -1
+
+
+def stream_bios(f, src, dest=None, uid=None, remove=False, table=None, chunk_size=stream_chunk_size):
+    """analyze (with dest also trim, optionally injecting uid or removing UID) BIOS image from a (non-seekable) stream in constant memory - rolling overlap-window signature scan, captured detection/UID bytes, DESTINATION written as data flows; result dict"""
+    if dest and os.path.isfile(dest):
+        raise BiosError("error: DESTINATION BIOS image (%s) preexists! refuse to overwrite (nondestructive).\n" % dest, 11)
+    if table is None:
+        table = sig_table
+    lap = timings_lap()
+    sigs = table_sigs(table)
+    sig_offsets = dict.fromkeys(sigs, -1)
+    pending = list(sig_offsets)
+    overlap = max([len(sig) for sig in sigs] or [1]) - 1
+    # retained bytes - signatures straddling chunks and capture margins before a signature
+    lookback = overlap + stream_capture_margin
+    bios_offset_sigs = dict(table['bios_offset'])
+    uid_sigs = [entry[0] for entry in table['bios_uid']]
+    # pending captures [start, end) - header and (fallback/preset) BIOS offset headers
+    captures = [(0x0, 0x10)] + [(drb_offset, drb_offset + 0x10) for drb_offset, drb_str in bios_offset_list]
+    image = SparseImage()
+    window, pos = b'', 0
+    bios_offset = out_pos = None
+    dest_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666) if dest else None
+    written = 0
+    try:
+        while True:
+            chunk = f.read(chunk_size)
+            buf, base = window + chunk, pos - len(window)
+            end = pos + len(chunk)
+            # signatures - new bytes plus overlap
+            for sig, found in find_sigs(buf, pending, max(pos - overlap - base, 0)).items():
+                sig_offsets[sig] = base + found
+                captures.append((base + found - stream_capture_margin, base + found + (dmi_max_size if sig in uid_sigs else len(sig) + stream_capture_margin)))
+            # captures complete (or EOF)
+            for capture in captures[:]:
+                if capture[1] <= end or not chunk:
+                    start = max(capture[0], base, 0)
+                    image.add(start, buf[start - base:capture[1] - base])
+                    captures.remove(capture)
+            # BIOS offset - TRIMMED header or BIOS offset signature (the same checks as analyze_bios)
+            if bios_offset is None and end >= len(rel_header):
+                head = image[:0x10] or buf[:0x10]
+                if head[:len(rel_header)] != rel_header and any(head[:len(header)] == header for header in (bios_header_f7a, bios_header_f7g)):
+                    bios_offset = 0x0
+                for sig, sig_offset in bios_offset_sigs.items():
+                    if bios_offset is None and sig_offsets[sig] >= 0:
+                        bios_offset = sig_offsets[sig] + sig_offset
+                if bios_offset is not None:
+                    if bios_offset < base:
+                        raise BiosError("%s: error: BIOS offset (%s) before retained stream bytes! unsupported signature table offset.\n" % (src, hex(bios_offset)), 7)
+                    out_pos = bios_offset
+            # DESTINATION - BIOS bytes as they flow
+            if dest_fd is not None and out_pos is not None:
+                out_end = min(end, bios_offset + bios_size)
+                if out_end > out_pos:
+                    write_all(dest_fd, memoryview(buf)[out_pos - base:out_end - base])
+                    written += out_end - out_pos
+                    out_pos = out_end
+            if not chunk:
+                break
+            pos = end
+            window = buf[-lookback:]
+        count_bytes(read=pos)
+        lap('stream: read/scan/write')
+        image.size = pos
+        info = analyze_bios(image, pos, table, sig_offsets)
+        info['src'] = src
+        result = {'src': src, 'dest': dest, 'info': info, 'read': pos, 'size': written, 'uid_injected': False, 'uid_padding': 0, 'uid_removed': False}
+        if dest_fd is None:
+            return result
+        if bios_offset is None or info['bios_offset'] != bios_offset:
+            raise BiosError("%s: error: BIOS offset not detected in stream! (fallback/preset BIOS offsets require a SOURCE file)\n" % src, 7)
+        if written != bios_size:
+            raise BiosError("""\
+%s: error: BIOS byte size mismatch! | %s != %s | %s byte size difference!
+%s: error: CORRUPT or INVALID BIOS detected!
+""" % (src, written, bios_size, written - bios_size, src), 10)
+        # inject UID / remove UID (inject blank UID) - patch the written UID region
+        uid_offset, uid_size = info['bios_uid_offset'], info['bios_uid_size']
+        if uid_offset is not None and uid_offset >= bios_offset and (uid is not None or remove):
+            if uid is not None:
+                result['uid_padding'] = max(uid_size - len(uid), 0)
+                patch = uid + b'\xff' * result['uid_padding']
+            else:
+                patch = b'\xff' * uid_size
+            if uid_offset - bios_offset + len(patch) > bios_size:
+                raise BiosError("""\
+error: injected BIOS greater than BIOS byte size! | %s > %s | %s extra bytes!
+error: CORRUPT or INVALID injected BIOS detected!
+""" % (uid_offset - bios_offset + len(patch), bios_size, uid_offset - bios_offset + len(patch) - bios_size), 9)
+            os.lseek(dest_fd, uid_offset - bios_offset, os.SEEK_SET)
+            write_all(dest_fd, patch)
+            result['uid_injected'], result['uid_removed'] = uid is not None, uid is None
+        return result
+    except BaseException:
+        if dest_fd is not None:
+            os.close(dest_fd)
+            dest_fd = None
+            os.remove(dest)
+        raise
+    finally:
+        if dest_fd is not None:
+            os.close(dest_fd)
+
+
+def store_chunks(size, bios_offset, chunk_size=store_chunk_size):
+    """chunk tuple list [(offset, byte size)] of a size byte image - aligned at bios_offset, so TRIMMED (BACKUP) and UNTRIMMED RELEASE images share BIOS chunks"""
+    offsets = sorted(set([0] + list(range(bios_offset % chunk_size if 0 < bios_offset < size else 0, size, chunk_size))))
+    return [(offset, end - offset) for offset, end in zip(offsets, offsets[1:] + [size])]
+
+
+def store_chunk_path(store, digest):
+    """store chunk file path (uncompressed content SHA-256, compressed: .z suffix added)"""
+    return os.path.join(store, store_chunk_dir, digest[:2], digest)
+
+
+def store_manifest_path(store, device):
+    """store device manifest file path - ValueError for unsafe device names"""
+    if not device or device.startswith('.') or os.sep in device or (os.altsep and os.altsep in device):
+        raise ValueError('INVALID device name (%s)' % device)
+    return os.path.join(store, store_manifest_dir, device + '.json')
+
+
+def store_write(path, data):
+    """write file atomically (temporary file + rename) - concurrent ingests never see partial chunks/manifests"""
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp_file = tempfile.mkstemp(prefix='.', dir=directory)
+    try:
+        write_all(fd, data)
+    finally:
+        os.close(fd)
+    os.replace(tmp_file, path)
+
+
+def store_add(store, src, device=None, compress=True, info=None, table=None, cache=None):
+    """add SOURCE BIOS image to the deduplicating store - unique chunks stored once (optionally zlib compressed), per-device manifest (default device: SOURCE file name); result dict"""
+    # imported on demand - store only
+    import zlib
+    if info is None:
+        info = analyze(src, table, cache)
+    if device is None:
+        device = os.path.splitext(os.path.basename(src))[0]
+    manifest_file = store_manifest_path(store, device)
+    view = memoryview(info['data'])
+    image_sha256 = sha256_chunked(view)
+    if os.path.isfile(manifest_file):
+        with open(manifest_file) as manifest_if:
+            if json.load(manifest_if).get('sha256') != image_sha256:
+                raise BiosError("error: store device (%s) preexists with a different image! refuse to overwrite (nondestructive).\n" % device, 23)
+    lap = timings_lap()
+    chunks = []
+    new_chunks = stored = 0
+    for offset, size in store_chunks(len(view), info['bios_offset']):
+        chunk = view[offset:offset + size]
+        digest = hashlib.sha256(chunk).hexdigest()
+        chunks.append(digest)
+        chunk_file = store_chunk_path(store, digest)
+        if os.path.isfile(chunk_file) or os.path.isfile(chunk_file + '.z'):
+            continue
+        if compress:
+            chunk, chunk_file = zlib.compress(chunk, store_compress_level), chunk_file + '.z'
+        store_write(chunk_file, chunk)
+        new_chunks += 1
+        stored += len(chunk)
+    lap('store: chunks')
+    manifest = {'version': store_ver, 'device': device, 'src': os.path.basename(src), 'size': len(view), 'sha256': image_sha256,
+                'bios_offset': info['bios_offset'], 'bios_ver': info['bios_ver'], 'chunk_size': store_chunk_size, 'chunks': chunks}
+    store_write(manifest_file, json.dumps(manifest, indent=1).encode('utf-8'))
+    count_bytes(written=stored)
+    return {'src': src, 'device': device, 'manifest': manifest_file, 'size': len(view), 'chunks': len(chunks),
+            'new_chunks': new_chunks, 'stored': stored, 'sha256': image_sha256}
+
+
+def store_load(store, device):
+    """load store device manifest - dict (BiosError 23 if missing/unsupported)"""
+    manifest_file = store_manifest_path(store, device)
+    if not os.path.isfile(manifest_file):
+        raise BiosError("error: store device (%s) does not exist! (%s)\n" % (device, store), 23)
+    with open(manifest_file) as manifest_if:
+        manifest = json.load(manifest_if)
+    if manifest.get('version') != store_ver:
+        raise BiosError("error: store device (%s) manifest version UNSUPPORTED! (%s != %s)\n" % (device, manifest.get('version'), store_ver), 23)
+    return manifest
+
+
+def store_rebuild(store, device):
+    """rebuild store device image byte-exactly - bytearray (chunk and image SHA-256 checked, BiosError 23 if missing/corrupt)"""
+    # imported on demand - store only
+    import zlib
+    manifest = store_load(store, device)
+    lap = timings_lap()
+    image = bytearray()
+    for digest in manifest['chunks']:
+        chunk_file = store_chunk_path(store, digest)
+        try:
+            if os.path.isfile(chunk_file + '.z'):
+                with open(chunk_file + '.z', 'rb') as chunk_if:
+                    chunk = zlib.decompress(chunk_if.read())
+            else:
+                with open(chunk_file, 'rb') as chunk_if:
+                    chunk = chunk_if.read()
+        except (EnvironmentError, zlib.error) as e:
+            raise BiosError("error: store chunk (%s) of device (%s) missing or CORRUPT! | %s\n" % (digest, device, e), 23)
+        if hashlib.sha256(chunk).hexdigest() != digest:
+            raise BiosError("error: store chunk (%s) of device (%s) CORRUPT! SHA-256 mismatch.\n" % (digest, device), 23)
+        image += chunk
+    count_bytes(read=len(image))
+    lap('store: rebuild')
+    if len(image) != manifest['size'] or sha256_chunked(image) != manifest['sha256']:
+        raise BiosError("error: store device (%s) rebuild CORRUPT! image SHA-256 mismatch.\n" % device, 23)
+    return image
+
+
+def store_stats(store):
+    """store device manifests and chunk totals - dict (devices: manifest dicts without chunk lists)"""
+    devices = []
+    manifest_dir = os.path.join(store, store_manifest_dir)
+    for name in sorted(os.listdir(manifest_dir)) if os.path.isdir(manifest_dir) else []:
+        if name.endswith('.json') and not name.startswith('.'):
+            manifest = store_load(store, name[:-len('.json')])
+            devices.append(dict((key, value) for key, value in manifest.items() if key != 'chunks'))
+    chunks = stored = 0
+    for root, dirs, files in os.walk(os.path.join(store, store_chunk_dir)):
+        for name in files:
+            if not name.startswith('.'):
+                chunks += 1
+                stored += os.path.getsize(os.path.join(root, name))
+    return {'store': store, 'devices': devices, 'chunks': chunks, 'stored': stored, 'images': sum(device['size'] for device in devices)}
+
+
+def synth_bios(f7a=False, release=True, uid=True, seed=0):
+    """synthesize a valid-looking F7G/F7A UNTRIMMED RELEASE or TRIMMED BIOS image (pseudorandom fill, known headers/signatures/offsets) - bytearray"""
+    rng = random.Random(seed)
+    offset = bios_offset_list[0][0] if release else 0x0
+    size = rel_bios_size_list[1 if f7a else 0][0] if release else bios_size
+    image = bytearray(rng.getrandbits(size * 8).to_bytes(size, 'little'))
+    # erased (0xFF) top of the flash
+    image[offset + synth_erased_offset:offset + bios_size] = b'\xff' * (bios_size - synth_erased_offset)
+    if release:
+        image[:len(rel_header)] = rel_header
+        image[offset - bios_offset_str_offset:offset - bios_offset_str_offset + len(bios_offset_str)] = bios_offset_str
+    header = bios_header_f7a if f7a else bios_header_f7g
+    image[offset:offset + len(header)] = header
+    ec_str, ec_str_offset, ec_size, ec_date_str_offset, ec_date_size = ec_offset_list[-1 if f7a else 0]
+    ec_date = synth_ec_date[:ec_date_size]
+    # blocks and their mirrors
+    for mirror in 0x0, 0x800000:
+        ver_offset = offset + bios_ver_offset_list[0] + mirror
+        ver_str = bios_ver_offset_str_f7a if f7a else bios_ver_offset_str_f7g
+        image[ver_offset:ver_offset + bios_ver_size + tbios_ver_size] = bytes(rel_bios_ver_f7a if f7a else rel_bios_ver_f7g, 'utf-8') + b'\x00' * tbios_ver_size
+        image[ver_offset - bios_ver_offset_str_offset:ver_offset - bios_ver_offset_str_offset + len(ver_str)] = ver_str
+        date_offset = offset + bios_date_offset_list[0] + mirror
+        image[date_offset - bios_date_offset_str_offset:date_offset] = bios_date_offset_str
+        image[date_offset:date_offset + bios_date_size] = synth_bios_date
+    ec_str_at = offset + ec_rev_offset_list[0] - ec_str_offset
+    image[ec_str_at:ec_str_at + len(ec_str)] = ec_str
+    image[ec_str_at + ec_str_offset:ec_str_at + ec_str_offset + ec_size] = bytes((synth_ec_rev_f7a if f7a else synth_ec_rev_f7g)[:ec_size], 'utf-8')
+    image[ec_str_at + ec_date_str_offset:ec_str_at + ec_date_str_offset + ec_date_size] = bytes(ec_date, 'utf-8')
+    # EC firmware block mirrored (whole block - region ec-mirror identical)
+    ec_offset = offset + ec_rev_offset_list[0] - ec_rev_offset_list[0] % ec_firmware_size
+    image[ec_offset + ec_firmware_size:ec_offset + 2 * ec_firmware_size] = image[ec_offset:ec_offset + ec_firmware_size]
+    # UID ($DMI) followed by erased (0xFF) bytes
+    uid_offset = offset + rel_bios_uid_offset_list[0][0] - bios_offset_list[0][0]
+    uid = bytes(generate_uids(1, f7a, seed=seed)['uids']) if uid else bios_uid_offset_str
+    image[uid_offset:uid_offset + len(uid) + synth_uid_padding] = uid + b'\xff' * synth_uid_padding
+    return image
+
+
+def synthesize(dest_dir, seed=0):
+    """write synthetic F7G/F7A UNTRIMMED RELEASE and TRIMMED (BACKUP) BIOS images to dest_dir - written path list"""
+    if not os.path.isdir(dest_dir):
+        os.makedirs(dest_dir)
+    paths = []
+    for f7a in False, True:
+        version = rel_bios_ver_f7a if f7a else rel_bios_ver_f7g
+        for release, name in (True, '%s_sign.fd'), (False, 'jupiter-%s-bios-backup.bin'):
+            path = os.path.join(dest_dir, synth_file % (name % version))
+            with open(path, 'wb') as synth_of:
+                synth_of.write(synth_bios(f7a, release, seed=seed))
+            paths.append(path)
+    return paths
+
+
+def benchmark(rounds=5, batch_size_list=None, of=None, as_json=False):
+    """benchmark analyze/trim/backup/inject/remove over synthetic RELEASE/TRIMMED images and batch analyze - wall time (min/median of rounds) and peak traced memory (tracemalloc); result dict list"""
+    # imported on demand - benchmark only
+    import shutil
+    import tracemalloc
+    if of is None:
+        of = sys.stdout
+    if batch_size_list is None:
+        batch_size_list = bench_batch_size_list
+    bench_dir = tempfile.mkdtemp(prefix='jupiter-bios-bench-')
+    results = []
+    try:
+        images = synthesize(os.path.join(bench_dir, 'images'))
+        uid_file = os.path.join(bench_dir, 'uid.bin')
+        generate_uid(uid_file, seed=0)
+        out = os.path.join(bench_dir, 'out.bin')
+        devnull = open(os.devnull, 'w')
+        ops = []
+        for src in images:
+            ops += [
+                ('analyze', src, lambda src=src: analyze(src)),
+                ('trim', src, lambda src=src: trim(src, out)),
+                ('backup', src, lambda src=src: backup_uid(src, out)),
+                ('inject', src, lambda src=src: inject_uid(src, out, uid_file)),
+                ('remove', src, lambda src=src: remove_uid(src, out))]
+        for batch_size in batch_size_list:
+            batch_dir = os.path.join(bench_dir, 'batch-%s' % batch_size)
+            os.makedirs(batch_dir)
+            for i in range(batch_size):
+                os.link(images[i % len(images)], os.path.join(batch_dir, '%04d%s' % (i, os.path.splitext(images[i % len(images)])[1])))
+            ops.append(('batch', batch_dir, lambda batch_dir=batch_dir: batch_analyze([batch_dir], of=devnull)))
+        if not as_json:
+            of.write('%-8s %-42s %10s %13s %13s %14s\n' % ('op', 'image', 'byte size', 'wall min', 'wall median', 'peak memory'))
+        for op, src, func in ops:
+            walls = []
+            # last round traced (tracemalloc overhead excluded from wall time)
+            for i in range(rounds + 1):
+                if os.path.exists(out):
+                    os.remove(out)
+                if i == rounds:
+                    tracemalloc.start()
+                start = time.perf_counter()
+                func()
+                wall = time.perf_counter() - start
+                if i == rounds:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                else:
+                    walls.append(wall)
+            walls.sort()
+            size = os.path.getsize(src) if os.path.isfile(src) else sum(os.path.getsize(os.path.join(src, name)) for name in os.listdir(src))
+            result = {'op': op, 'image': os.path.basename(src), 'size': size, 'rounds': rounds,
+                      'wall_min': walls[0], 'wall_median': walls[len(walls) // 2], 'peak': peak}
+            results.append(result)
+            if as_json:
+                of.write(json.dumps(result) + '\n')
+            else:
+                of.write('%-8s %-42s %10s %10.2f ms %10.2f ms %10.1f KiB\n' % (op, result['image'], size, result['wall_min'] * 1000, result['wall_median'] * 1000, peak / 1024.0))
+            of.flush()
+        devnull.close()
+    finally:
+        shutil.rmtree(bench_dir)
+    return results
+
+
+def json_info(info):
+    """JSON-safe analyze() info - without mapped data, UID base64 encoded"""
+    info = dict((key, value) for key, value in info.items() if key != 'data')
+    if info['bios_uid'] is not None:
+        info['bios_uid'] = base64.b64encode(info['bios_uid']).decode('ascii')
+    return info
+
+
+def daemon_analyze(resident, lock, src, table=None, cache=None):
+    """analyze SOURCE through the resident (daemon) LRU of analyzed images - keyed by path/device/inode/size/mtime; analyze() info"""
+    st = os.stat(src)
+    key = (os.path.realpath(src), st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    with lock:
+        info = resident.pop(key, None)
+        if info is not None:
+            resident[key] = info
+            return dict(info, src=src)
+    info = analyze(src, table, cache)
+    with lock:
+        resident[key] = info
+        # least recently used first (dict order) - mapping closed once unreferenced
+        while len(resident) > daemon_resident_size:
+            resident.pop(next(iter(resident)))
+    return dict(info, src=src)
+
+
+def daemon_request(request, resident, lock, table=None, cache=None):
+    """handle one daemon JSON request (op: ping/analyze/backup/trim/inject/remove/generate) - JSON response dict"""
+    response = {'ok': True}
+    if isinstance(request, dict) and 'id' in request:
+        response['id'] = request['id']
+    try:
+        if not isinstance(request, dict):
+            raise ValueError('request is not a JSON object')
+        op = request.get('op')
+        if op == 'ping':
+            result = {'ver': ver, 'resident': len(resident)}
+        elif op == 'generate':
+            count = request.get('count', 1)
+            if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= daemon_generate_max:
+                raise ValueError('INVALID count (%r) - integer 1-%s' % (count, daemon_generate_max))
+            gen = generate_uids(count, request.get('f7a', False), request.get('int', False),
+                                request.get('ev2', False), request.get('ev3', False), request.get('seed'))
+            result = {'rev': gen['rev'], 'count': gen['count'], 'size': gen['size'], 'serials': gen['serials']}
+            if request.get('uid_file'):
+                result['uid_files'] = write_uids(gen, request['uid_file'])
+            else:
+                view = memoryview(gen['uids'])
+                result['uids'] = [base64.b64encode(view[i * gen['size']:(i + 1) * gen['size']]).decode('ascii') for i in range(gen['count'])]
+        elif op in daemon_op_list:
+            src = request['src']
+            info = daemon_analyze(resident, lock, src, table, cache)
+            if op == 'analyze':
+                result = json_info(info)
+            elif op == 'backup':
+                result = backup_uid(src, request.get('uid_file', backup_uid_default_file), info)
+            else:
+                uid = None
+                if op == 'inject':
+                    uid = base64.b64decode(request['uid']) if 'uid' in request else read_uid(request.get('uid_file', backup_uid_default_file))
+                result = trim(src, request['dest'], uid=uid, remove=op == 'remove', info=info, verify=request.get('verify', False))
+        else:
+            raise ValueError('unknown op (%s)' % op)
+    except BiosError as e:
+        return dict(response, ok=False, error=str(e).strip(), status=e.status)
+    except (EnvironmentError, ValueError, KeyError, TypeError) as e:
+        return dict(response, ok=False, error='%s: %s' % (e.__class__.__name__, e))
+    response['result'] = result
+    return response
+
+
+def daemon(path, table=None, cache=None, of=None):
+    """serve JSON requests (one per line, one JSON response line each) on a Unix domain socket - threaded, resident analyzed SOURCE images; until SIGTERM/SIGINT"""
+    # imported on demand - daemon only
+    import signal
+    import socket
+    import socketserver
+    import threading
+    if of is None:
+        of = sys.stdout
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            raise BiosError("error: daemon socket (%s) in use! refuse to replace.\n" % path, 21)
+        except socket.error:
+            # stale socket
+            os.remove(path)
+        finally:
+            probe.close()
+    resident = {}
+    lock = threading.Lock()
+
+    class DaemonHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line.decode('utf-8'))
+                except ValueError as e:
+                    response = {'ok': False, 'error': 'INVALID JSON request: %s' % e}
+                else:
+                    response = daemon_request(request, resident, lock, table, cache)
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                self.wfile.flush()
+
+    class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    # owner only
+    umask = os.umask(0o177)
+    try:
+        server = DaemonServer(path, DaemonHandler)
+    finally:
+        os.umask(umask)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print("daemon: listening on (%s) | ops (%s).\n" % (path, '/'.join(['ping', 'generate'] + daemon_op_list)), file=of)
+    of.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+    return 0
+
+
+def watch_inotify(path):
+    """inotify file descriptor watching directory path for finished files (watch_inotify_mask) - None if unavailable (polling fallback)"""
+    # imported on demand - watch only
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(path), watch_inotify_mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def watch_events(fd, timeout):
+    """wait up to timeout seconds for inotify events - (finished file name list, overflow)"""
+    # imported on demand - watch only
+    import select
+    names, overflow = [], False
+    if not select.select([fd], [], [], timeout)[0]:
+        return names, overflow
+    try:
+        buf = os.read(fd, 0x10000)
+    except BlockingIOError:
+        return names, overflow
+    offset = 0
+    while offset + 16 <= len(buf):
+        wd, mask, cookie, length = struct.unpack_from('iIII', buf, offset)
+        name = buf[offset + 16:offset + 16 + length].rstrip(b'\0')
+        offset += 16 + length
+        if mask & watch_inotify_overflow:
+            overflow = True
+        elif name:
+            names.append(os.fsdecode(name))
+    return names, overflow
+
+
+def watch_candidate(name):
+    """watched inbox file name is a SOURCE BIOS image candidate (batch_ext_list, not hidden/temporary)"""
+    return not name.startswith('.') and os.path.splitext(name)[1].lower() in batch_ext_list
+
+
+def watch_process(src, out_dir, trim_out=False, table=None, cache=None):
+    """process one watched SOURCE BIOS image - analyze, backup UID and optionally trim into out_dir; batch NDJSON record dict (uid_file, dest, error/status)"""
+    stem = os.path.splitext(os.path.basename(src))[0]
+    record = {'src': src}
+    try:
+        info = analyze(src, table, cache)
+        record.update((key, info[key]) for key in batch_record_keys)
+        record['invalid'] = bool(record['invalid'])
+        record['uid_file'] = record['dest'] = None
+        if info['bios_uid']:
+            record['uid_file'] = backup_uid(src, os.path.join(out_dir, watch_dest_file % (stem, 'UID')), info)['uid_file']
+        if trim_out and not info['trimmed']:
+            record['dest'] = trim(src, os.path.join(out_dir, watch_dest_file % (stem, 'trimmed')), info=info)['dest']
+    except BiosError as e:
+        record.update(error=str(e).strip(), status=e.status)
+    except (EnvironmentError, ValueError) as e:
+        record['error'] = str(e)
+    return record
+
+
+def load_watch_state(path):
+    """load watch processed state (JSON, missing file: empty) - {name: {size, mtime_ns, error}}"""
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as state_if:
+        loaded = json.load(state_if)
+    if not isinstance(loaded, dict) or loaded.get('version') != watch_state_ver:
+        raise ValueError('unsupported watch state version (%s != %s)' % (loaded.get('version') if isinstance(loaded, dict) else None, watch_state_ver))
+    return loaded['files']
+
+
+def watch(inbox, out_dir, trim_out=False, jobs=None, table=None, cache=None, as_json=False, of=None):
+    """watch inbox directory (inotify, else polling) and process new/finished SOURCE BIOS images in a bounded process pool (watch_process) - processed files remembered in out_dir state; until SIGTERM/SIGINT"""
+    # imported on demand - watch only
+    import concurrent.futures
+    import multiprocessing
+    import signal
+    if of is None:
+        of = sys.stdout
+    if not os.path.isdir(inbox):
+        raise BiosError("error: watch inbox directory (%s) does not exist!\n" % inbox, 4)
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    if os.path.realpath(inbox) == os.path.realpath(out_dir):
+        raise BiosError("error: watch OUTPUT directory (%s) is the inbox! refuse to process own output.\n" % out_dir, 26)
+    state_path = os.path.join(out_dir, watch_state_file)
+    try:
+        state = load_watch_state(state_path)
+    except (EnvironmentError, ValueError, KeyError) as e:
+        raise BiosError("error: watch state (%s) INVALID! | %s\n" % (state_path, e), 26)
+
+    def save_state():
+        fd, tmp_file = tempfile.mkstemp(prefix='.', suffix='.json', dir=out_dir)
+        with os.fdopen(fd, 'w') as state_of:
+            json.dump({'version': watch_state_ver, 'files': state}, state_of, indent=1, sort_keys=True)
+        os.replace(tmp_file, state_path)
+
+    def stat_key(name):
+        try:
+            st = os.stat(os.path.join(inbox, name))
+        except EnvironmentError:
+            return None
+        return [st.st_size, st.st_mtime_ns] if os.path.isfile(os.path.join(inbox, name)) else None
+
+    def remembered(name, key):
+        entry = state.get(name)
+        return entry is not None and [entry['size'], entry['mtime_ns']] == key
+
+    # name -> (stat key, last change time) - files settling (polling, startup listing)
+    pending = {}
+    # future -> (name, stat key) - in the pool
+    running = {}
+    jobs = jobs or multiprocessing.cpu_count()
+    pool = concurrent.futures.ProcessPoolExecutor(jobs)
+
+    def submit(name, key):
+        if key is None or remembered(name, key) or any(name == job[0] and key == job[1] for job in running.values()):
+            return
+        pending.pop(name, None)
+        running[pool.submit(watch_process, os.path.join(inbox, name), out_dir, trim_out, table, cache)] = (name, key)
+
+    def listing():
+        now = time.monotonic()
+        for name in sorted(os.listdir(inbox)):
+            if watch_candidate(name) and name not in pending:
+                key = stat_key(name)
+                if key is not None and not remembered(name, key):
+                    pending[name] = (key, now)
+
+    def harvest(futures):
+        for future in futures:
+            name, key = running.pop(future)
+            # interrupted worker (SIGINT) - not remembered, retried on the next run
+            if future.cancelled() or future.exception() is not None:
+                continue
+            record = future.result()
+            state[name] = {'size': key[0], 'mtime_ns': key[1], 'error': record.get('error')}
+            if as_json:
+                of.write(json.dumps(record) + '\n')
+            elif record.get('error'):
+                print(record['error'], file=of)
+            else:
+                print("%s: processed (%s) | UID backup (%s) | trimmed (%s)." % (
+                    record['src'], record['bios_ver'] or 'UNKNOWN', record['uid_file'] or 'NO/NULL UID', record['dest'] or 'no'), file=of)
+            of.flush()
+        if futures:
+            save_state()
+
+    fd = watch_inotify(inbox)
+    dir_mtime = os.stat(inbox).st_mtime_ns
+    listing()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if not as_json:
+        print("watch: %s -> %s | %s | %s remembered | %s workers.\n" % (inbox, out_dir, 'inotify' if fd is not None else 'polling',
+                                                                       len(state), jobs), file=of)
+        of.flush()
+    try:
+        while True:
+            if fd is not None:
+                names, overflow = watch_events(fd, watch_poll_interval)
+                if overflow:
+                    listing()
+                # closed after writing / moved in - finished
+                for name in names:
+                    if watch_candidate(name):
+                        submit(name, stat_key(name))
+            else:
+                time.sleep(watch_poll_interval)
+                # directory mtime changes on create/rename/delete only - relist then
+                mtime = os.stat(inbox).st_mtime_ns
+                if mtime != dir_mtime:
+                    dir_mtime = mtime
+                    listing()
+            now = time.monotonic()
+            for name, (key, since) in list(pending.items()):
+                current = stat_key(name)
+                if current is None:
+                    pending.pop(name)
+                elif current != key:
+                    pending[name] = (current, now)
+                elif now - since >= watch_settle_time:
+                    submit(name, key)
+            harvest([future for future in running if future.done()])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(wait=True)
+        harvest([future for future in running if future.done()])
+        if fd is not None:
+            os.close(fd)
+    return 0
+
+
+def print_title(of=None):
+    """print title (random border)"""
+    rc = random.choice(rcl)
+    print("""
  ┏%s┓
  ┃ Steam Deck (jupiter) BIOS Tool v%s ┃
  ┣%s (jupiter-bios-tool) %s┫
  ┃Copyright (C) %s %s┃
  ┗%s┛
-""" % (rc * 37, ver, '━' * 8, '━' * 8, cyr, base64.b64decode('RHJha2UgU3RlZmFuaQ==').decode('utf-8'), rc * 37))
-if '-h' in sys.argv or '--help' in sys.argv:
+""" % (rc * 37, ver, '━' * 8, '━' * 8, cyr, base64.b64decode('RHJha2UgU3RlZmFuaQ==').decode('utf-8'), rc * 37), file=of or sys.stdout)
+
+
+def print_help_text():
+    """print description, source code, documentation, BIOS database, BIOS download, and BIOS backup (-h, --help)"""
     print("═" * 22)
     print("""\
 Automatically analyze, verify, backup/generate/inject UID, and dynamically trim
@@ -233,339 +2778,711 @@ $ sudo jupiter_bios_updater/h2offt jupiter-%s-bios-backup.bin -O""" % (url, rand
     print("━" * 22)
     #print("\n%s\n" % ('═' * 22))
     print()
-else:
-    print("""\
--h, --help to show description, source code, documentation, BIOS database,
-BIOS download, BIOS backup, and help (usage, examples, positional arguments,
-and options).
-""")
 
-parser = argparse.ArgumentParser(usage='''\
+
+def print_summary(info, extra=''):
+    """print one-line SOURCE analysis summary (archive members, streams)"""
+    print("%s: BIOS version (%s) | EC revision (%s) | BIOS date (%s) | BIOS offset (%s) | UID offset (%s)%s%s." % (
+        info['src'], info['bios_ver'] or 'UNKNOWN', info['ec_rev'], info['bios_date'], hex(info['bios_offset']),
+        hex(info['bios_uid_offset']) if info['bios_uid_offset'] is not None else None, ' | INVALID' if info['invalid'] else '', extra))
+
+
+def print_verify(verify):
+    """print DESTINATION verification result - True if verified"""
+    for region, offset in verify['mismatches']:
+        print("%s: error: %s mismatch at offset (%s)!" % (verify['dest'], region, hex(offset)))
+    for name, offset, mirror_offset, match in verify['mirrors']:
+        if not match:
+            print("%s: error: %s mirror mismatch at offsets (%s, %s)!" % (verify['dest'], name, hex(offset), hex(mirror_offset)))
+    if not verify['verified']:
+        print("%s: error: DESTINATION BIOS image verification FAILED! DO NOT FLASH!" % verify['dest'])
+        return False
+    print("%s: DESTINATION BIOS image verified (%s mirrored blocks)." % (verify['dest'], len(verify['mirrors'])))
+    return True
+
+
+def print_timings(result, as_json=False, of=None):
+    """print Timings result (stderr - stdout output unchanged) - human-readable table or one JSON line"""
+    of = of or sys.stderr
+    if as_json:
+        print(json.dumps(result), file=of)
+        return
+    print("%-28s %12s %6s" % ('phase', 'wall', 'count'), file=of)
+    for phase in result['phases']:
+        print("%-28s %9.3f ms %6s" % (phase['phase'], phase['wall'] * 1000, phase['count']), file=of)
+    print("%-28s %9.3f ms" % ('total', result['wall'] * 1000), file=of)
+    print("bytes read/mapped (%s) | bytes written (%s) | peak traced memory (%s)\n" % (
+        result['bytes_read'], result['bytes_written'], '%.1f KiB' % (result['peak'] / 1024.0) if result['peak'] is not None else 'N/A'), file=of)
+
+
+def build_parser():
+    """build CLI argument parser"""
+    # imported on demand - CLI only
+    import argparse
+    parser = argparse.ArgumentParser(usage='''\
 %(prog)s [SOURCE_BIOS_IMAGE[.bin|.fd|.rom]]
        [DESTINATION_BIOS_IMAGE[.bin|.rom]] [-h] [-b] [-g] [-i] [-r] [-v]
 
  e.g.: %(prog)s jupiter-''' + rel_bios_ver_f7g + '''-bios-backup.bin -b
        %(prog)s ''' + rel_bios_ver_f7g + '_sign.fd jupiter-' + rel_bios_ver_f7g + '-bios-injected.bin -i')
-parser.add_argument('src', metavar='SOURCE_BIOS_IMAGE[.bin|.fd|.rom]', nargs='?',
-                    help='analyze/verify SOURCE BIOS image (e.g., %s)' % (rel_bios_ver_f7g + '_sign.fd'))
-parser.add_argument('dest', metavar='DESTINATION_BIOS_IMAGE[.bin|.rom]', nargs='?',
-                    help='dynamically trim SOURCE BIOS image and/or inject UID to DESTINATION (SOURCE -> DESTINATION)')
-parser.add_argument('-b', '--backup-uid', dest='backup_uid', const=backup_uid_default_file, metavar='BACKUP_UID_TO_FILE', nargs='?',
-                    help='backup SOURCE UID to SPECIFIED file (default: %s)' % backup_uid_default_file)
-parser.add_argument('-g', '--generate-uid', dest='generate_uid', const=generate_uid_default_file, metavar='GENERATE_UID_TO_FILE', nargs='?',
-                    help='generate (pseudorandom) F7G/F7A UID to SPECIFIED file (default: %s) and inject to DESTINATION (if SPECIFIED)' % generate_uid_default_file)
-parser.add_argument('--ev2', '--EV2', dest='generate_serial_ev2', action='store_true',
-                    help='generate (pseudorandom) EV2 serial integer/number/alphanumeric (e.g., FXYY[132]ZZZZZ)')
-parser.add_argument('--ev3', '--EV3', dest='generate_serial_ev3', action='store_true',
-                    help='generate (pseudorandom) EV3 serial integer/number/alphanumeric (e.g., FXYY[133]ZZZZZ)')
-parser.add_argument('--f7a', '--F7A', dest='generate_uid_f7a', action='store_true',
-                    help='generate (pseudorandom) F7A UID instead of %s UID (default: %s)' % (gen_uid_list[0][:3], gen_uid_list[0][:3]))
-parser.add_argument('--int', '--num', dest='generate_uid_int', action='store_true',
-                    help='generate (pseudorandom) integer/number UID instead of alphanumeric UID (e.g., FXYYA1B2C3D4 -> FXYY12345678) (default: alphanumeric)')
-parser.add_argument('-i', '--inject-uid', dest='inject_uid', const=backup_uid_default_file, metavar='INJECT_UID_FROM_FILE', nargs='?',
-                    help='inject UID from SPECIFIED file (default: %s) to DESTINATION' % backup_uid_default_file)
-parser.add_argument('-r', '--remove-uid', dest='remove_uid', action='store_true',
-                    help='remove ("scrub") UID from SOURCE to DESTINATION (commonize/sanitize)')
-parser.add_argument('-v', '--version', dest='version', action='store_true',
-                    help='show version information and exit')
-args = parser.parse_args()
-
-if args.version:
-    sys.exit(0)
-
-# enable UID generation if argument --f7a and/or --int and/or --ev2 and/or --ev3 specified (and not -g)
-if args.generate_uid_f7a or args.generate_uid_int or args.generate_serial_ev2 or args.generate_serial_ev3:
-    if not args.generate_uid:
-        args.generate_uid = generate_uid_default_file
-
-# generate UID file - F7G(0105) / F7A(0115/0116/0118/0119)
-if args.generate_uid:
-    if args.generate_uid_f7a:
-        gen_uid_rev = 'F7A'
-    else:
-        gen_uid_rev = 'F7G'
-    # nondestructive/conforming (refuse to overwrite)
-    #if os.path.isfile(args.generate_uid):
-    # destructive/nonconforming (overwrite generate_uid_default_file)
-    if os.path.isfile(args.generate_uid) and args.generate_uid != generate_uid_default_file:
-        print("error: generated UID file (%s) preexists! refuse to overwrite (nondestructive).\n" % args.generate_uid)
-        sys.exit(1)
-    with open(args.generate_uid, 'wb') as gen_uid_of:
-        gen_uid_of.write(b'$DMI')
-        gen_uid_of.write(b'\x02\x07\x00\x11\x00')
-        #if not meYX_alpha or not isinstance(meYX_alpha, str) or not meYX_alpha.isalpha() or not len(meYX_alpha) == 1 or not meYX_alpha[0].isupper():
-        if not meYX_alpha or not isinstance(meYX_alpha, str) or not meYX_alpha.isalpha():
-            #meYX_alpha = str(chr(random.randint(ord('A'), ord('Z'))))
-            meYX_alpha = str(chr(random.randint(65, 90)))
-        if args.generate_uid_f7a:
-            gen_uid_of.write(b'MEB' + bytes(meYX_alpha[0].upper(), 'utf-8'))
-        else:
-            gen_uid_of.write(b'MEC' + bytes(meYX_alpha[0].upper(), 'utf-8'))
-        if not meYX_int or not isinstance(meYX_int, int):
-            meYX_int = random.randint(0, 99999999)
-        #meYX_int = '{:08d}'.format(meYX_int)
-        meYX_int = str(meYX_int).zfill(8)
-        if not meYX_alnum or not meYX_alnum.isalnum():
-            meYX_alnum = ''.join(random.choice(string.ascii_letters + string.digits) for i in range(8))
-        meYX_alnum = str(meYX_alnum).zfill(8)
-        if args.generate_uid_int:
-            gen_uid_of.write(bytes(meYX_int, 'utf-8'))
-        else:
-            gen_uid_of.write(bytes(meYX_alnum.upper(), 'utf-8'))
-        gen_uid_of.write(b'\x02\x07\xff\x11\x00')
-        if args.generate_uid_f7a:
-            gen_uid_of.write(b'MEB' + bytes(meYX_alpha[0].upper(), 'utf-8'))
-        else:
-            gen_uid_of.write(b'MEC' + bytes(meYX_alpha[0].upper(), 'utf-8'))
-        if args.generate_uid_int:
-            gen_uid_of.write(bytes(meYX_int, 'utf-8'))
-        else:
-            gen_uid_of.write(bytes(meYX_alnum.upper(), 'utf-8'))
-        gen_uid_of.write(b'\x01\x07\x00\x11\x00')
-        #if not fXYY_alpha or not isinstance(fXYY_alpha, str) or not fXYY_alpha.isalpha() or not len(fXYY_alpha) == 1 or not fXYY_alpha[0].isupper():
-        if not fXYY_alpha or not isinstance(fXYY_alpha, str) or not fXYY_alpha.isalpha():
-            #fXYY_alpha = str(chr(random.randint(ord('A'), ord('Z'))))
-            fXYY_alpha = str(chr(random.randint(65, 90)))
-        if args.generate_uid_f7a:
-            gen_uid_of.write(b'F' + bytes(fXYY_alpha[0].upper(), 'utf-8') + b'AA')
-        else:
-            gen_uid_of.write(b'F' + bytes(fXYY_alpha[0].upper(), 'utf-8') + b'ZZ')
-        if not fXYY_int or not isinstance(fXYY_int, int):
-            if args.generate_serial_ev3:
-                fXYY_int = int(str(133) + str(random.randint(0, 99999)))
-            elif args.generate_serial_ev2:
-                fXYY_int = int(str(132) + str(random.randint(0, 99999)))
-            else:
-                fXYY_int = random.randint(0, 99999999)
-        #fXYY_int = '{:08d}'.format(fXYY_int)
-        fXYY_int = str(fXYY_int).zfill(8)
-        if not fXYY_alnum or not fXYY_alnum.isalnum():
-            if args.generate_serial_ev3:
-                fXYY_alnum = '133' + ''.join(random.choice(string.ascii_letters + string.digits) for i in range(5))
-            elif args.generate_serial_ev2:
-                fXYY_alnum = '132' + ''.join(random.choice(string.ascii_letters + string.digits) for i in range(5))
+    parser.add_argument('src', metavar='SOURCE_BIOS_IMAGE[.bin|.fd|.rom]', nargs='?',
+                        help='analyze/verify SOURCE BIOS image (e.g., %s) or %s members of a SOURCE %s archive (- for stdin)' % (rel_bios_ver_f7g + '_sign.fd', archive_member_pattern, '/'.join(rel_bios_dl_pkg)))
+    parser.add_argument('dest', metavar='DESTINATION_BIOS_IMAGE[.bin|.rom]', nargs='?',
+                        help='dynamically trim SOURCE BIOS image and/or inject UID to DESTINATION (SOURCE -> DESTINATION) - SOURCE archive: DESTINATION directory (%s)' % (archive_dest_file % ('MEMBER', 'trimmed')))
+    parser.add_argument('--release', dest='release', metavar='RELEASE',
+                        help='SOURCE is the indexed release library BIOS image (latest-f7g, latest-f7a, %s, ...) - "list" prints the library' % rel_bios_ver_f7a)
+    parser.add_argument('--library', dest='library', metavar='RELEASE_DIR',
+                        help='release BIOS library directory (%s) (default: %s)' % (archive_member_pattern, ' or '.join(library_dir_list)))
+    parser.add_argument('-b', '--backup-uid', dest='backup_uid', const=backup_uid_default_file, metavar='BACKUP_UID_TO_FILE', nargs='?',
+                        help='backup SOURCE UID to SPECIFIED file (default: %s) - without DESTINATION, reads only the UID block at preset offsets (full scan on a miss)' % backup_uid_default_file)
+    parser.add_argument('-g', '--generate-uid', dest='generate_uid', const=generate_uid_default_file, metavar='GENERATE_UID_TO_FILE', nargs='?',
+                        help='generate (pseudorandom) F7G/F7A UID to SPECIFIED file (default: %s) and inject to DESTINATION (if SPECIFIED)' % generate_uid_default_file)
+    parser.add_argument('--ev2', '--EV2', dest='generate_serial_ev2', action='store_true',
+                        help='generate (pseudorandom) EV2 serial integer/number/alphanumeric (e.g., FXYY[132]ZZZZZ)')
+    parser.add_argument('--ev3', '--EV3', dest='generate_serial_ev3', action='store_true',
+                        help='generate (pseudorandom) EV3 serial integer/number/alphanumeric (e.g., FXYY[133]ZZZZZ)')
+    parser.add_argument('--f7a', '--F7A', dest='generate_uid_f7a', action='store_true',
+                        help='generate (pseudorandom) F7A UID instead of %s UID (default: %s)' % (gen_uid_list[0][:3], gen_uid_list[0][:3]))
+    parser.add_argument('--int', '--num', dest='generate_uid_int', action='store_true',
+                        help='generate (pseudorandom) integer/number UID instead of alphanumeric UID (e.g., FXYYA1B2C3D4 -> FXYY12345678) (default: alphanumeric)')
+    parser.add_argument('-n', '--count', dest='generate_uid_count', metavar='COUNT', type=int, default=1,
+                        help='generate COUNT (pseudorandom) F7G/F7A UIDs with unique serials - to SPECIFIED directory (existing or trailing %s: one file per UID) or packed file (default: 1)' % os.sep)
+    parser.add_argument('--seed', dest='generate_uid_seed', metavar='SEED', type=int,
+                        help='seed (deterministic/reproducible) UID generation (default: pseudorandom)')
+    parser.add_argument('-i', '--inject-uid', dest='inject_uid', const=backup_uid_default_file, metavar='INJECT_UID_FROM_FILE', nargs='?',
+                        help='inject UID from SPECIFIED file (default: %s) to DESTINATION' % backup_uid_default_file)
+    parser.add_argument('--inject-uids', dest='inject_uids', metavar='UID_FILE|UID_DIR', nargs='+',
+                        help='inject each UID (files, directories, packed UID files) to its own DESTINATION directory BIOS image (%s) - SOURCE trimmed once, cloned per UID' % (inject_uids_dest_file % ('VERSION', 'UID')))
+    parser.add_argument('-r', '--remove-uid', dest='remove_uid', action='store_true',
+                        help='remove ("scrub") UID from SOURCE to DESTINATION (commonize/sanitize)')
+    parser.add_argument('--stream', dest='stream', action='store_true',
+                        help='read SOURCE once as a stream in constant memory (default for stdin -, pipes and devices) - DESTINATION written as data flows (-g, --inject-uids, --diff, --delta, --apply-delta, --compact unsupported)')
+    parser.add_argument('--verify', dest='verify', action='store_true',
+                        help='re-read and verify DESTINATION BIOS image(s) against SOURCE (and injected/removed UID) and mirrored blocks')
+    parser.add_argument('--diff', dest='diff', metavar='OTHER_BIOS_IMAGE',
+                        help='diff SOURCE and OTHER BIOS image (aligned at BIOS offsets, e.g., UNTRIMMED RELEASE vs BACKUP) - changed ranges annotated with UID/EC/version/date regions')
+    parser.add_argument('--region', dest='region', metavar='REGION',
+                        help='extract named REGION of SOURCE to DESTINATION reading only its bytes (located from preset offsets, cache or scan) - "list" prints the region index')
+    parser.add_argument('--delta', dest='delta', metavar='CURRENT_CHIP_IMAGE',
+                        help='write only changed erase blocks vs CURRENT chip image (backup) to DESTINATION delta plus DESTINATION%s (flashrom layout list)' % delta_layout_ext)
+    parser.add_argument('--delta-mode', dest='delta_mode', choices=delta_mode_list, default=delta_mode_list[0],
+                        help='delta erase block byte size: 4KB sectors, 64KB blocks, or auto (cheaper estimated erase/program time per 64KB block) (default: %s)' % delta_mode_list[0])
+    parser.add_argument('--compact', dest='compact', const=compact_layout_list[0], metavar='LAYOUT', nargs='?', choices=compact_layout_list,
+                        help='write DESTINATION as compact container without erased (0xFF) %sKB blocks - packed, or sparse (erased runs as file holes) (default: %s)' % (
+                            erased_block_size // 1024, compact_layout_list[0]))
+    parser.add_argument('--expand', dest='expand', action='store_true',
+                        help='expand (and SHA-256 verify) compact container SOURCE byte-exactly to DESTINATION BIOS image')
+    parser.add_argument('--apply-delta', dest='apply_delta', metavar='DELTA_FILE',
+                        help='apply DELTA to SOURCE (CURRENT chip image) and write DESTINATION BIOS image')
+    parser.add_argument('--batch', dest='batch', metavar='SOURCE_DIR|GLOB', nargs='+',
+                        help='batch analyze/verify SOURCE BIOS images (directories: %s) in parallel and report one NDJSON record per image (completion order)' % '/'.join(batch_ext_list))
+    parser.add_argument('-j', '--jobs', dest='jobs', metavar='JOBS', type=int,
+                        help='batch/watch worker process count (1+, default: CPU count)')
+    parser.add_argument('--watch', dest='watch', metavar=('INBOX_DIR', 'OUTPUT_DIR'), nargs=2,
+                        help='watch INBOX for new/finished SOURCE BIOS images (inotify, else polling) - analyze and backup UID (optionally --watch-trim) into OUTPUT in a worker pool; processed files are remembered')
+    parser.add_argument('--watch-trim', dest='watch_trim', action='store_true',
+                        help='also trim watched UNTRIMMED SOURCE BIOS images into OUTPUT')
+    parser.add_argument('--cache', dest='cache', const=analysis_cache_mode_list[0], metavar='MODE', nargs='?', choices=analysis_cache_mode_list,
+                        help='cache SOURCE analysis on disk (skip rescanning unchanged images) keyed by %s (default: %s)' % ('/'.join(analysis_cache_mode_list), analysis_cache_mode_list[0]))
+    parser.add_argument('--cache-dir', dest='cache_dir', metavar='CACHE_DIR',
+                        help='analysis cache directory (default: $XDG_CACHE_HOME/jupiter-bios-tool)')
+    parser.add_argument('--fingerprints', dest='fingerprints', const=fingerprint_index_default_file, metavar='FINGERPRINT_INDEX_FILE', nargs='?',
+                        help='fingerprint (SHA-256 image/BIOS region) and identify SOURCE BIOS image(s) against SPECIFIED index (default: %s)' % fingerprint_index_default_file)
+    parser.add_argument('--fingerprint-add', dest='fingerprint_add', metavar='KNOWN_BIOS_IMAGE', nargs='+',
+                        help='add known (RELEASE/TRIMMED) BIOS image fingerprints to the fingerprint index and exit')
+    parser.add_argument('--registry', dest='registry', const=registry_default_file, metavar='UID_REGISTRY_FILE', nargs='?',
+                        help='record backed-up (-b) and generated (-g) UIDs in SPECIFIED UID registry (SQLite, indexed by serial) and reject generated serial collisions (default: %s)' % registry_default_file)
+    parser.add_argument('--registry-find', dest='registry_find', metavar='SERIAL', nargs='+',
+                        help='look up ME/F serials (e.g., MEC..., FXYY...) in the UID registry and exit')
+    parser.add_argument('--store', dest='store', metavar='STORE_DIR',
+                        help='deduplicating BIOS backup store - add SOURCE BIOS image (unique %sKB chunks stored once, per-device manifest), --restore a device, or list devices' % (store_chunk_size // 1024))
+    parser.add_argument('--device', dest='device', metavar='DEVICE',
+                        help='store device name of SOURCE (default: SOURCE file name without extension)')
+    parser.add_argument('--restore', dest='restore', metavar=('DEVICE', 'DESTINATION'), nargs=2,
+                        help='rebuild store DEVICE BIOS image byte-exactly to DESTINATION')
+    parser.add_argument('--no-compress', dest='no_compress', action='store_true',
+                        help='store new chunks uncompressed (default: zlib compressed)')
+    parser.add_argument('--synthesize', dest='synthesize', metavar='SYNTHETIC_DIR',
+                        help='write synthetic (valid-looking) F7G/F7A UNTRIMMED RELEASE and TRIMMED BIOS images to SPECIFIED directory and exit')
+    parser.add_argument('--benchmark', dest='benchmark', const=5, metavar='ROUNDS', nargs='?', type=int,
+                        help='benchmark analyze/trim/backup/inject/remove and batch analyze over synthetic BIOS images (wall time, peak memory) and exit (default: 5 rounds)')
+    parser.add_argument('--timings', dest='timings', action='store_true',
+                        help='report per-phase wall time (open/read, detection steps, UID, trim, write), bytes read/written, and peak traced memory (tracemalloc) to stderr')
+    parser.add_argument('--json', dest='json', action='store_true',
+                        help='report (benchmark, timings) as NDJSON')
+    parser.add_argument('--daemon', dest='daemon', metavar='SOCKET_PATH',
+                        help='serve JSON requests (one per line: {"op": "analyze|backup|trim|inject|remove|generate", "src": ..., "dest": ...}) on a Unix domain socket, keeping recently used SOURCE images analyzed (generate "count": 1-%s)' % daemon_generate_max)
+    parser.add_argument('--signatures', dest='signatures', metavar='SIGNATURE_TABLE_FILE',
+                        help='load (versioned) JSON signature table (version %s) to extend/override built-in signatures/offsets (e.g., new F7G/F7A releases)' % sig_table_ver)
+    parser.add_argument('-v', '--version', dest='version', action='store_true',
+                        help='show version information and exit')
+    return parser
+
+
+def main(argv=None):
+    """CLI - return exit status"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if '-h' in argv or '--help' in argv:
+        print_title()
+        print_help_text()
+    args = build_parser().parse_args(argv)
+    # title - stderr in batch mode (stdout is the NDJSON report)
+    title_of = sys.stderr if args.batch or args.json else sys.stdout
+    print_title(title_of)
+    print("""\
+-h, --help to show description, source code, documentation, BIOS database,
+BIOS download, BIOS backup, and help (usage, examples, positional arguments,
+and options).
+""", file=title_of)
+
+    if args.version:
+        return 0
+
+    if args.timings:
+        with Timings() as recorder:
+            status = dispatch(args, title_of)
+        print_timings(recorder.result(), args.json)
+        return status
+    return dispatch(args, title_of)
+
+
+def dispatch(args, title_of=None):
+    """CLI - dispatch parsed arguments (daemon, synthesize/benchmark, fingerprints, watch, batch, delta, diff, cli) - return exit status"""
+    global analysis_cache_dir
+    if title_of is None:
+        title_of = sys.stdout
+
+    if args.cache_dir:
+        analysis_cache_dir = args.cache_dir
+
+    table = sig_table
+    if args.signatures:
+        try:
+            table = load_sig_table(args.signatures)
+        except (EnvironmentError, ValueError, TypeError, IndexError, AttributeError) as e:
+            print("error: signature table (%s) INVALID! | %s\n" % (args.signatures, e))
+            return 13
+
+    # daemon (Unix domain socket)
+    if args.daemon:
+        try:
+            return daemon(args.daemon, table, args.cache)
+        except BiosError as e:
+            print(e)
+            return e.status
+
+    # synthetic BIOS images / benchmark
+    if args.synthesize:
+        for path in synthesize(args.synthesize):
+            print("%s: synthetic BIOS image written. byte size (%s)." % (path, os.path.getsize(path)))
+        print("")
+        return 0
+    if args.benchmark is not None:
+        if args.benchmark < 1:
+            print("error: benchmark rounds (%s) INVALID!\n" % args.benchmark, file=title_of)
+            return 15
+        benchmark(args.benchmark, as_json=args.json)
+        return 0
+
+    # add known BIOS image fingerprints
+    if args.fingerprint_add:
+        index_file = args.fingerprints or fingerprint_index_default_file
+        try:
+            for entry in add_fingerprints(index_file, args.fingerprint_add, table, args.cache):
+                print("%s: fingerprint added (%s) | SHA-256 (%s) | BIOS region SHA-256 (%s)." % (entry['name'], entry['bios_ver'] or 'UNKNOWN', entry['sha256'], entry['bios_sha256']))
+        except (EnvironmentError, ValueError, KeyError, AttributeError) as e:
+            print("error: fingerprint index (%s) INVALID! | %s\n" % (index_file, e))
+            return 17
+        print("")
+        return 0
+
+    fingerprints = None
+    if args.fingerprints:
+        try:
+            fingerprints = load_fingerprints(args.fingerprints)
+        except (EnvironmentError, ValueError, KeyError, AttributeError) as e:
+            print("error: fingerprint index (%s) INVALID! | %s\n" % (args.fingerprints, e), file=title_of)
+            return 17
+
+    # batch/watch worker process count
+    if args.jobs is not None and args.jobs < 1:
+        print("error: worker process count (%s) INVALID!\n" % args.jobs, file=title_of)
+        return 15
+
+    # watch inbox directory - process new/finished SOURCE BIOS images
+    if args.watch:
+        try:
+            return watch(args.watch[0], args.watch[1], args.watch_trim, args.jobs, table, args.cache, args.json)
+        except BiosError as e:
+            print(e)
+            return e.status
+
+    # batch analyze SOURCE BIOS images (NDJSON report)
+    if args.batch:
+        if not batch_analyze(args.batch, args.jobs, table, cache=args.cache, fingerprints=fingerprints):
+            print("error: no SOURCE BIOS images found! (%s)\n" % ' '.join(args.batch), file=sys.stderr)
+            return 14
+        return 0
+
+    # release BIOS library - resolve SOURCE (index refreshed for new/changed files only)
+    if args.release:
+        directory = args.library or next((path for path in library_dir_list if os.path.isdir(path)), None)
+        if directory is None or not os.path.isdir(directory):
+            print("error: release BIOS library directory (%s) does not exist!\n" % (directory or ' or '.join(library_dir_list)))
+            return 4
+        entries, refreshed = library_index(directory, table, args.cache)
+        if args.release == 'list':
+            for entry in sorted(entries, key=lambda entry: (entry['bios_ver'] or '', entry['name'])):
+                print("%s: %s | EC revision (%s) date (%s) | BIOS date (%s) | byte size (%s)%s." % (
+                    entry['name'], entry['bios_ver'] or 'UNKNOWN', entry['ec_rev'] or 'UNKNOWN', entry['ec_date'] or 'UNKNOWN', entry['bios_date'] or 'UNKNOWN', entry['size'],
+                    ' | INVALID' if entry['invalid'] else ''))
+            print("%s: %s release BIOS images | %s refreshed.\n" % (directory, len(entries), refreshed))
+            return 0
+        entry = library_resolve(entries, args.release)
+        if entry is None:
+            print("%s: error: release (%s) not found! (%s)\n" % (directory, args.release, ', '.join(sorted(set(entry['bios_ver'] for entry in entries if entry['bios_ver']))) or 'empty library'))
+            return 28
+        if args.src and args.dest:
+            print("error: SOURCE BIOS image (%s) and --release (%s) both SPECIFIED!\n" % (args.src, args.release))
+            return 3
+        # positional is DESTINATION
+        args.src, args.dest = os.path.join(directory, entry['name']), args.dest or args.src
+        print("%s: release (%s) resolved to %s %s | %s of %s indexed images refreshed.\n" % (directory, args.release, entry['name'], entry['bios_ver'], refreshed, len(entries)))
+
+    # UID registry (SQLite) - look up serials or record backed-up/generated UIDs
+    registry = None
+    if args.registry or args.registry_find:
+        try:
+            registry = registry_open(args.registry or registry_default_file)
+        except BiosError as e:
+            print(e)
+            return e.status
+    if args.registry_find:
+        found = 0
+        for serial in args.registry_find:
+            records = registry_find(registry, serial)
+            found += bool(records)
+            for record in records:
+                print("%s: %s %s UID (%s/%s) | %s | SOURCE (%s) | UID file (%s) | SHA-256 (%s)." % (
+                    serial, record['kind'], record['rev'] or 'UNKNOWN', record['me_serial'], record['f_serial'],
+                    time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['added'])), record['src'], record['uid_file'], record['uid_sha256']))
+            if not records:
+                print("%s: error: serial not found in UID registry!" % serial)
+        print("")
+        return 0 if found == len(args.registry_find) else 24
+
+    # deduplicating BIOS backup store - add SOURCE / restore DEVICE / list devices
+    if args.store:
+        try:
+            if args.restore:
+                device, dest = args.restore
+                write_bios(dest, [store_rebuild(args.store, device)])
+                print("%s: successfully rebuilt store device (%s) BIOS image: %s -> %s\n" % (dest, device, args.store, dest))
+            elif args.src:
+                if not os.path.isfile(args.src):
+                    print("error: SOURCE BIOS image (%s) does not exist!\n" % args.src)
+                    return 4
+                result = store_add(args.store, args.src, args.device, not args.no_compress, table=table, cache=args.cache)
+                print("%s: stored as device (%s) | %s chunks, %s new | %s bytes stored for byte size (%s).\n" % (
+                    args.src, result['device'], result['chunks'], result['new_chunks'], result['stored'], result['size']))
             else:
-                fXYY_alnum = ''.join(random.choice(string.ascii_letters + string.digits) for i in range(8))
-        fXYY_alnum = str(fXYY_alnum).zfill(8)
-        if args.generate_uid_int:
-            gen_uid_of.write(bytes(fXYY_int, 'utf-8'))
-        else:
-            gen_uid_of.write(bytes(fXYY_alnum.upper(), 'utf-8'))
-        gen_uid_of.write(b'\x01\x07\xff\x11\x00')
-        if args.generate_uid_f7a:
-            gen_uid_of.write(b'F' + bytes(fXYY_alpha[0].upper(), 'utf-8') + b'AA')
-        else:
-            gen_uid_of.write(b'F' + bytes(fXYY_alpha[0].upper(), 'utf-8') + b'ZZ')
-        if args.generate_uid_int:
-            gen_uid_of.write(bytes(fXYY_int, 'utf-8'))
-        else:
-            gen_uid_of.write(bytes(fXYY_alnum.upper(), 'utf-8'))
-        if args.generate_uid_f7a:
-            gen_uid_of.write(b'\x0b\x06\x00\x16\x00')
-            #gen_uid_of.write(b'5.0')
-            #gen_uid_of.write(b'5.555555555555555')
-            gen_uid_of.write(b'5.' + b'5' * 15)
-            gen_uid_of.write(b'\x0b\x06\xff\x16\x00')
-            #gen_uid_of.write(b'5.0')
-            #gen_uid_of.write(b'5.555555555555555')
-            gen_uid_of.write(b'5.' + b'5' * 15)
-            gen_uid_of.write(b'\x0b\x05\x00\x40\x00')
-            gen_uid_of.write(bytes(uid_1_f7a, 'utf-8'))
-            gen_uid_of.write(b'\x0b\x05\xff\x40\x00')
-            gen_uid_of.write(bytes(uid_1_f7a, 'utf-8'))
-            gen_uid_of.write(b'\x0b\x07\x00\x40\x00')
-            gen_uid_of.write(bytes(uid_2_f7a, 'utf-8'))
-            gen_uid_of.write(b'\x0b\x07\xff\x40\x00')
-            gen_uid_of.write(bytes(uid_2_f7a, 'utf-8'))
+                stats = store_stats(args.store)
+                for device in stats['devices']:
+                    print("%s: %s (%s) | byte size (%s) | SHA-256 (%s)." % (device['device'], device['bios_ver'] or 'UNKNOWN', device['src'], device['size'], device['sha256']))
+                print("%s: %s devices | %s chunks | %s bytes stored for %s image bytes.\n" % (args.store, len(stats['devices']), stats['chunks'], stats['stored'], stats['images']))
+        except BiosError as e:
+            print(e)
+            return e.status
+        except (EnvironmentError, ValueError, KeyError) as e:
+            print("error: store (%s) INVALID! | %s\n" % (args.store, e))
+            return 23
+        return 0
+
+    # named region of SOURCE - index from preset offsets (positional reads), cache or scan
+    if args.region:
+        if not args.src:
+            print("error: SOURCE BIOS image not SPECIFIED!\n")
+            return 3
+        if not os.path.isfile(args.src):
+            print("error: SOURCE BIOS image (%s) does not exist!\n" % args.src)
+            return 4
+        names = [] if args.region == 'list' else [args.region]
+        try:
+            info, method = locate_regions(args.src, names, table, args.cache)
+            regions = region_index(info)
+            if args.region == 'list':
+                for name, region in sorted(regions.items(), key=lambda item: (item[1]['offset'], item[0])):
+                    print("%s: region (%s) at offset (%s) | byte size (%s)%s." % (args.src, name, hex(region['offset']), region['size'],
+                                                                               ' | mirror of (%s)' % region['mirror'] if region['mirror'] else ''))
+                print("%s: %s regions | located by (%s).\n" % (args.src, len(regions), method))
+                return 0
+            if args.region not in regions:
+                print("%s: error: region (%s) not found! (%s)\n" % (args.src, args.region, ', '.join(sorted(regions)) or 'no regions'))
+                return 25
+            region = regions[args.region]
+            print("%s: region (%s) at offset (%s) | byte size (%s) | SHA-256 (%s) | located by (%s)." % (
+                args.src, args.region, hex(region['offset']), region['size'], region_sha256(info, args.region), method))
+            for name in sorted(regions):
+                if args.region in (name, regions[name]['mirror']) and regions[name]['mirror']:
+                    mirror = regions[name]
+                    identical = region_sha256(info, mirror['name']) == region_sha256(info, mirror['mirror'])
+                    print("%s: region (%s) mirror (%s) at offset (%s) %s." % (args.src, mirror['mirror'], mirror['name'], hex(mirror['offset']),
+                                                                          'identical' if identical else 'DIFFERS'))
+            if args.dest:
+                write_bios(args.dest, [(region['offset'], region['size'])], args.src)
+                print("%s: successfully extracted region (%s): %s -> %s" % (args.dest, args.region, args.src, args.dest))
+        except BiosError as e:
+            print(e)
+            if e.status in abort_status_list:
+                print("abort!\n")
+            return e.status
+        print("")
+        return 0
+
+    # expand compact container SOURCE to DESTINATION
+    if args.expand:
+        if not args.src:
+            print("error: SOURCE compact container not SPECIFIED!\n")
+            return 3
+        if not os.path.isfile(args.src):
+            print("error: SOURCE compact container (%s) does not exist!\n" % args.src)
+            return 4
+        try:
+            image = expand_compact(open_bios(args.src), args.src)
+            print("%s: compact container expanded | byte size (%s) | SHA-256 verified." % (args.src, len(image)))
+            if args.dest:
+                write_bios(args.dest, [image])
+                print("%s: successfully expanded BIOS image: %s -> %s" % (args.dest, args.src, args.dest))
+        except BiosError as e:
+            print(e)
+            if e.status in abort_status_list:
+                print("abort!\n")
+            return e.status
+        print("")
+        return 0
+
+    # SOURCE archive (zip/tar) or stream (stdin -, pipe, device, --stream) - head bytes decide, non-seekable SOURCE read once
+    archive = stream = False
+    source = None
+    if args.src == '-' or (args.src and os.path.exists(args.src) and not os.path.isdir(args.src)):
+        regular = args.src != '-' and os.path.isfile(args.src)
+        sf = sys.stdin.buffer if args.src == '-' else open(args.src, 'rb')
+        head = sf.read(archive_head_size)
+        archive = archive_kind(head) is not None
+        stream = not archive and (args.stream or not regular)
+        if regular and not stream:
+            sf.close()
         else:
-            gen_uid_of.write(b'\x0b\x08\x00\x17\x00')
-            #gen_uid_of.write(b'14.555555555555555')
-            gen_uid_of.write(b'14.' + b'5' * 15)
-            gen_uid_of.write(b'\x0b\x08\xff\x17\x00')
-            #gen_uid_of.write(b'14.555555555555555')
-            gen_uid_of.write(b'14.' + b'5' * 15)
-            gen_uid_of.write(b'\x0b\x06\x00\x17\x00')
-            #gen_uid_of.write(b'12.555555555555555')
-            gen_uid_of.write(b'12.' + b'5' * 15)
-            gen_uid_of.write(b'\x0b\x06\xff\x17\x00')
-            #gen_uid_of.write(b'12.555555555555555')
-            gen_uid_of.write(b'12.' + b'5' * 15)
-            gen_uid_of.write(b'\x0b\x05\x00\x1a\x00')
-            gen_uid_of.write(bytes(uid_1_f7g, 'utf-8'))
-            gen_uid_of.write(b'\x0b\x05\xff\x1a\x00')
-            gen_uid_of.write(bytes(uid_1_f7g, 'utf-8'))
-            gen_uid_of.write(b'\x0b\x07\x00\x1a\x00')
-            gen_uid_of.write(bytes(uid_1_f7g, 'utf-8'))
-            gen_uid_of.write(b'\x0b\x07\xff\x1a\x00')
-            gen_uid_of.write(bytes(uid_1_f7g, 'utf-8'))
-        print("successfully generated %s UID file (%s). byte size (%s).\n" % (gen_uid_rev, args.generate_uid, gen_uid_of.tell()))
+            source = ArchiveStream(head, sf)
+
+    # SOURCE archive - members analyzed/trimmed in memory
+    if archive:
+        unsupported = [option for key, option in archive_unsupported_option_list if getattr(args, key)]
+        if unsupported:
+            print("%s: error: option (%s) unsupported for archive SOURCE!\n" % (args.src, ', '.join(unsupported)), file=title_of)
+            return 29
+        status = 0
+        count = 0
+        try:
+            uid = read_uid(args.inject_uid) if args.inject_uid else None
+            for result in analyze_archive(args.src, args.dest, uid, args.remove_uid, table, args.verify, f=source):
+                count += 1
+                info = result['info']
+                if args.json:
+                    record = dict((key, info[key]) for key in batch_record_keys)
+                    record['invalid'] = bool(record['invalid'])
+                    if result['trim']:
+                        record['dest'] = result['trim']['dest']
+                        if args.verify:
+                            record['verified'] = result['trim']['verify']['verified']
+                    if result['error']:
+                        record['error'] = str(result['error']).strip()
+                    print(json.dumps(record))
+                else:
+                    print_summary(info)
+                    if result['trim']:
+                        print("%s: successfully made BIOS image: %s -> %s" % (result['trim']['dest'], info['src'], result['trim']['dest']))
+                        if args.verify and not print_verify(result['trim']['verify']):
+                            status = status or 18
+                    if result['error']:
+                        print(str(result['error']).rstrip())
+                if result['error']:
+                    status = status or result['error'].status
+        except BiosError as e:
+            print(e, file=title_of)
+            return e.status
+        if not count:
+            print("%s: error: no %s members found!\n" % (args.src, archive_member_pattern), file=title_of)
+            return 22
+        if not args.json:
+            print("")
+        return status
+
+    # stream SOURCE - constant memory, DESTINATION written as data flows
+    if stream:
+        unsupported = [option for key, option in stream_unsupported_option_list if getattr(args, key)]
+        if unsupported:
+            print("%s: error: option (%s) unsupported for streamed SOURCE!\n" % (args.src, ', '.join(unsupported)))
+            return 29
+        # TRIMMED or BACKUP header - nothing to trim (as for SOURCE files)
+        if args.dest and not args.backup_uid and not args.inject_uid and not args.remove_uid and head[:len(rel_header)] != rel_header and \
+                any(head[:len(header)] == header for header in (bios_header_f7a, bios_header_f7g)):
+            print("%s: error: TRIMMED or BACKUP BIOS image! nothing to trim.\n" % args.src)
+            print("abort!\n")
+            return 6
+        try:
+            uid = read_uid(args.inject_uid) if args.inject_uid else None
+            result = stream_bios(source, args.src, args.dest, uid, args.remove_uid, table)
+            info = result['info']
+            if args.json:
+                record = dict((key, info[key]) for key in batch_record_keys)
+                record.update(invalid=bool(record['invalid']), dest=result['dest'], uid_injected=result['uid_injected'], uid_removed=result['uid_removed'])
+                print(json.dumps(record))
+            else:
+                print_summary(info, ' | streamed byte size (%s)' % result['read'])
+            if args.backup_uid:
+                backup_uid(args.src, args.backup_uid, info)
+                print("%s: successfully backed up UID file (%s)." % (args.src, args.backup_uid))
+                if registry is not None:
+                    me, f = registry_add(registry, 'backup', [bytes(info['bios_uid'])], info['bios_ver'] and info['bios_ver'][:3], args.src, [args.backup_uid])[0]
+                    print("%s: successfully registered backed-up UID (%s/%s) (%s)." % (args.src, me, f, args.registry))
+            if result['dest']:
+                if result['uid_padding']:
+                    print("%s: inflating/padding UID byte size: %s -> %s | padding byte size (%s)." % (args.src, len(uid), len(uid) + result['uid_padding'], result['uid_padding']))
+                if result['uid_injected']:
+                    print("%s: injected UID file (%s) at offset (%s)." % (args.src, args.inject_uid, hex(info['bios_uid_offset'])))
+                elif result['uid_removed']:
+                    print("%s: removed UID at offset (%s) | byte size (%s)." % (args.src, hex(info['bios_uid_offset']), info['bios_uid_size']))
+                if args.verify:
+                    print("%s: warning: --verify unsupported for streamed SOURCE (not re-readable)." % args.dest)
+                print("%s: successfully made BIOS image (streamed): %s -> %s" % (args.dest, args.src, args.dest))
+        except BiosError as e:
+            print(e)
+            if e.status in abort_status_list:
+                print("abort!\n")
+            return e.status
+        if not args.json:
+            print("")
+        return 12 if args.dest and info['invalid'] else 0
+
+    # apply delta to SOURCE (CURRENT chip image)
+    if args.apply_delta:
+        for path in args.src, args.apply_delta:
+            if not path or not os.path.isfile(path):
+                print("error: SOURCE BIOS image or DELTA (%s) does not exist!\n" % path)
+                return 4
+        if not args.dest:
+            print("error: DESTINATION BIOS image not SPECIFIED!\n")
+            return 3
+        try:
+            write_bios(args.dest, [apply_delta(open_bios(args.src), args.apply_delta)])
+        except BiosError as e:
+            print(e)
+            return e.status
+        print("%s: successfully applied delta: %s + %s -> %s\n" % (args.dest, args.src, args.apply_delta, args.dest))
+        return 0
+
+    # diff SOURCE and OTHER BIOS images
+    if args.diff:
+        for path in args.src, args.diff:
+            if not path:
+                print("error: SOURCE BIOS image not SPECIFIED!\n")
+                return 3
+            if not os.path.isfile(path):
+                print("error: SOURCE BIOS image (%s) does not exist!\n" % path)
+                return 4
+        try:
+            diff = diff_bios(analyze(args.src, table, args.cache), analyze(args.diff, table, args.cache))
+        except BiosError as e:
+            print(e)
+            print("abort!\n")
+            return e.status
+        print("%s <-> %s: aligned at BIOS offsets (%s, %s) | compared byte size (%s)." % (args.src, args.diff, hex(diff['bios_offset']), hex(diff['other_bios_offset']), diff['size']))
+        for start, end, names in diff['ranges']:
+            print("  changed range (%s-%s) | byte size (%s)%s" % (hex(start), hex(end), end - start, ' | ' + ', '.join(names) if names else ''))
+        if not diff['ranges']:
+            print("%s <-> %s: identical BIOS images.\n" % (args.src, args.diff))
+            return 0
+        print("%s <-> %s: %s changed ranges | %s changed bytes.\n" % (args.src, args.diff, len(diff['ranges']), diff['changed']))
+        return 19
+
+    # UID-only backup - positional reads of the UID ($DMI) block, full scan on a miss
+    if args.backup_uid and args.src and not args.dest and os.path.isfile(args.src) and fingerprints is None and not (
+            args.inject_uid or args.inject_uids or args.remove_uid or args.generate_uid or args.generate_uid_f7a or args.generate_uid_int or
+            args.generate_serial_ev2 or args.generate_serial_ev3 or args.generate_uid_count != 1 or args.generate_uid_seed is not None):
+        try:
+            info, method = locate_uid(args.src, table, args.cache)
+            print_summary(info, ' | located by (%s)' % method)
+            if not info['bios_uid']:
+                # as without the fast path - nothing to backup is not an error
+                if info['bios_uid_offset'] is None:
+                    print("%s: warning: UID offset not detected! nothing to backup.\n" % args.src)
+                elif info['size'] > bios_size:
+                    print("%s: NO/NULL UID offset (%s) detected. TRIM AND INJECT UID (-i) OR FLASH WITH H2OFFT!\n" % (args.src, hex(info['bios_uid_offset'])))
+                else:
+                    print("%s: warning: NO/NULL UID offset (%s) detected! DO NOT FLASH! INJECT UID (-i)\n" % (args.src, hex(info['bios_uid_offset'])))
+                return 0
+            backup_uid(args.src, args.backup_uid, info)
+        except BiosError as e:
+            print(e)
+            if e.status in abort_status_list:
+                print("abort!\n")
+            return e.status
+        print("%s: successfully backed up UID file (%s) | UID offset (%s) | byte size (%s)." % (args.src, args.backup_uid, hex(info['bios_uid_offset']), info['bios_uid_size']))
+        if registry is not None:
+            me, f = registry_add(registry, 'backup', [bytes(info['bios_uid'])], info['bios_ver'] and info['bios_ver'][:3], args.src, [args.backup_uid])[0]
+            print("%s: successfully registered backed-up UID (%s/%s) (%s)." % (args.src, me, f, args.registry))
+        print("")
+        return 0
+
+    try:
+        return cli(args, table, fingerprints, registry)
+    except BiosError as e:
+        print(e)
+        if e.status in abort_status_list:
+            print("abort!\n")
+        return e.status
+
+
+def cli(args, table, fingerprints=None, registry=None):
+    """CLI - SOURCE/DESTINATION BIOS image operations (raise BiosError) - return exit status"""
+    # one-to-many injection (name, uid bytes) list
+    uids = None
+    # generated serials must not collide with registered ones
+    taken = functools.partial(registry_taken, registry) if registry is not None else None
+    # enable UID generation if argument --f7a and/or --int and/or --ev2 and/or --ev3 specified (and not -g)
+    if args.generate_uid_f7a or args.generate_uid_int or args.generate_serial_ev2 or args.generate_serial_ev3 or args.generate_uid_count != 1 or args.generate_uid_seed is not None:
+        if not args.generate_uid:
+            args.generate_uid = generate_uid_default_file
+
+    # bulk generate UID files (directory) or packed UID file - no injection
+    if args.generate_uid and args.generate_uid_count != 1:
+        gen = generate_uids(args.generate_uid_count, args.generate_uid_f7a, args.generate_uid_int, args.generate_serial_ev2, args.generate_serial_ev3, args.generate_uid_seed, taken=taken)
+        paths = write_uids(gen, args.generate_uid)
+        if registry is not None:
+            view = memoryview(gen['uids'])
+            registry_add(registry, 'generated', [view[i * gen['size']:(i + 1) * gen['size']].tobytes() for i in range(gen['count'])], gen['rev'],
+                         uid_files=paths if len(paths) == gen['count'] else paths * gen['count'])
+            print("successfully registered %s generated UIDs (%s)." % (gen['count'], args.registry))
+        print("successfully generated %s %s UIDs (%s). byte size (%s each).\n" % (gen['count'], gen['rev'], paths[0] if len(paths) == 1 else os.path.dirname(paths[0]) or os.curdir, gen['size']))
+        if not args.src:
+            return 0
+        # inject each generated UID to DESTINATION directory
+        view = memoryview(gen['uids'])
+        uids = [(f, view[i * gen['size']:(i + 1) * gen['size']].tobytes()) for i, (me, f) in enumerate(gen['serials'])]
+
+    # generate UID file - F7G(0105) / F7A(0115/0116/0118/0119)
+    elif args.generate_uid:
+        gen = generate_uid(args.generate_uid, args.generate_uid_f7a, args.generate_uid_int, args.generate_serial_ev2, args.generate_serial_ev3, args.generate_uid_seed, taken=taken)
+        if registry is not None:
+            registry_add(registry, 'generated', [gen['uid']], gen['rev'], uid_files=[gen['uid_file']])
+            print("successfully registered generated UID (%s/%s) (%s)." % (gen['serial'][0], gen['serial'][1], args.registry))
+        print("successfully generated %s UID file (%s). byte size (%s).\n" % (gen['rev'], gen['uid_file'], gen['size']))
         # inject with -i, --inject-uid
         #if args.inject_uid == backup_uid_default_file:
         # inject with/without -i, --inject-uid
         if args.inject_uid == backup_uid_default_file or not args.inject_uid:
             args.inject_uid = args.generate_uid
         if not args.src:
-            sys.exit(0)
+            return 0
 
-# read UID file
-if args.inject_uid:
-    if os.path.isfile(args.inject_uid):
-        with open(args.inject_uid, 'rb') as uid_if:
-            bios_uid_inject = uid_if.read()
-    else:
-        print("error: UID file (%s) does not exist!\n" % args.inject_uid)
-        sys.exit(2)
-
-# SOURCE BIOS image check
-if not args.src:
-    print("error: SOURCE BIOS image not SPECIFIED!\n")
-    sys.exit(3)
-if not os.path.isfile(args.src):
-    print("error: SOURCE BIOS image (%s) does not exist!\n" % args.src)
-    sys.exit(4)
-if os.path.getsize(args.src) < bios_size:
-    print("""\
+    # read UID file(s)
+    bios_uid_inject = None
+    if args.inject_uid and uids is None:
+        bios_uid_inject = read_uid(args.inject_uid)
+    if args.inject_uids:
+        uids = (uids or []) + read_uids(args.inject_uids)
+        if not uids:
+            print("error: no UID files found! (%s)\n" % ' '.join(args.inject_uids))
+            return 2
+
+    # SOURCE BIOS image check
+    if not args.src:
+        print("error: SOURCE BIOS image not SPECIFIED!\n")
+        return 3
+    if not os.path.isfile(args.src):
+        print("error: SOURCE BIOS image (%s) does not exist!\n" % args.src)
+        return 4
+    src_size = os.path.getsize(args.src)
+    if src_size < bios_size:
+        print("""\
 %s: error: less than BIOS byte size! | %s < %s | %s fewer bytes!
-%s: error: CORRUPT or INVALID BIOS detected!""" % (args.src, os.path.getsize(args.src), bios_size, os.path.getsize(args.src) - bios_size, args.src))
-    #if args.dest:
-    if args.dest and not args.backup_uid and not args.generate_uid and not args.inject_uid:
-        print("\nabort!\n")
-        sys.exit(5)
-# moved / more effective below
-#if os.path.getsize(args.src) == bios_size:
-    ##if args.dest:
-    #if args.dest and not args.backup_uid and not args.generate_uid and not args.inject_uid and not args.remove_uid:
-        #print("%s: error: TRIMMED or BACKUP BIOS image! nothing to trim.\n" % args.src)
-        #print("abort!\n")
-        #sys.exit(6)
-    #print("%s: TRIMMED or BACKUP BIOS image.\n" % args.src)
-    ##sys.exit(6)
-# detect RELEASE BIOS byte size
-for drb_size, drb_str in rel_bios_size_list:
-    if os.path.getsize(args.src) == drb_size:
-        #print("%s: valid UNTRIMMED RELEASE BIOS byte size (%s) detected." % (args.src, drb_size))
-        print("%s: valid UNTRIMMED RELEASE BIOS image %s byte size (%s) detected." % (args.src, drb_str, drb_size))
-        break
-
-# read SOURCE BIOS image binary
-with open(args.src, 'rb') as sf:
-    sf_data = sf.read()
-    # redundant?
-    sf.seek(0)
+%s: error: CORRUPT or INVALID BIOS detected!""" % (args.src, src_size, bios_size, src_size - bios_size, args.src))
+        #if args.dest:
+        if args.dest and not args.backup_uid and not args.generate_uid and not args.inject_uid and uids is None:
+            print("\nabort!\n")
+            return 5
+
+    # map SOURCE BIOS image binary (read-only) - memoryview slices share the mapping (zero-copy)
+    bios_info = analyze(args.src, table, args.cache)
+    if bios_info.get('cached'):
+        print("%s: cached analysis (%s) used." % (args.src, args.cache))
+    # identify SOURCE BIOS image (fingerprint index)
+    if fingerprints is not None:
+        image_sha256, bios_sha256 = fingerprint(bios_info['data'], bios_info['bios_offset'])
+        print("%s: SHA-256 (%s) | BIOS region SHA-256 (%s)." % (args.src, image_sha256, bios_sha256))
+        match = identify(fingerprints, image_sha256, bios_sha256)
+        if match:
+            print("%s: fingerprint identified (%s) %s BIOS image %s." % (args.src, match[0], match[1]['name'], match[1]['bios_ver'] or 'UNKNOWN'))
+        else:
+            print("%s: fingerprint UNKNOWN (not indexed)." % args.src)
+    bios_ver = bios_info['bios_ver']
+    bios_offset = bios_info['bios_offset']
+    invalid = bios_info['invalid']
+    bios_uid_offset = bios_info['bios_uid_offset']
+    bios_uid_size = bios_info['bios_uid_size']
+    # detect RELEASE BIOS byte size
+    if bios_info['size_class']:
+        #print("%s: valid UNTRIMMED RELEASE BIOS byte size (%s) detected." % (args.src, bios_info['size']))
+        print("%s: valid UNTRIMMED RELEASE BIOS image %s byte size (%s) detected." % (args.src, bios_info['size_class'], bios_info['size']))
     # detect BIOS image version
-    for bios_ver_offset_str in bios_ver_offset_str_f7g, bios_ver_offset_str_f7a:
-        if sf_data.find(bios_ver_offset_str) >= 0:
-        #if sf_data.rfind(bios_ver_offset_str) >= 0:
-            bios_ver_offset = sf_data.find(bios_ver_offset_str) + bios_ver_offset_str_offset
-            #bios_ver_offset = sf_data.rfind(bios_ver_offset_str) + bios_ver_offset_str_offset
-            sf.seek(bios_ver_offset)
-            bios_ver = str(sf.read(bios_ver_size), 'utf-8')
-            tbios_ver = str(sf.read(tbios_ver_size), 'utf-8')
-            if tbios_ver.isalnum():
-                bios_ver += tbios_ver
-            sf.seek(0)
-            print("%s: BIOS version (%s) detected at offset (%s)." % (args.src, bios_ver, hex(bios_ver_offset)))
-            break
+    if bios_ver:
+        print("%s: BIOS version (%s) detected at offset (%s)." % (args.src, bios_ver, hex(bios_info['bios_ver_offset'])))
     # detect BIOS image revision/date
-    for ec_rev_offset_str, ec_rev_offset_str_offset, ec_rev_size, ec_date_offset_str_offset, ec_date_size in ec_offset_list:
-        if sf_data.find(ec_rev_offset_str) >= 0:
-        #if sf_data.rfind(ec_rev_offset_str) >= 0:
-            ec_rev_offset = sf_data.find(ec_rev_offset_str) + ec_rev_offset_str_offset
-            sf.seek(ec_rev_offset)
-            ec_rev = str(sf.read(ec_rev_size), 'utf-8')
-            sf.seek(0)
-            #if not ec_rev[1:].isdigit():
-            if not ec_rev.isalnum():
-                ec_rev = None
-                continue
-            print("%s: EC revision (%s) detected at offset (%s)." % (args.src, ec_rev, hex(ec_rev_offset)))
-            ec_date_offset = sf_data.find(ec_rev_offset_str) + ec_date_offset_str_offset
-            sf.seek(ec_date_offset)
-            ec_date = str(sf.read(ec_date_size), 'utf-8')
-            sf.seek(0)
-            if not ec_date[:4].isdigit() or not ec_date[5:7].isdigit() or not ec_date[8:10].isdigit():
-                ec_date = None
-                continue
-            print("%s: EC date (%s) detected at offset (%s)." % (args.src, ec_date, hex(ec_date_offset)))
-            break
-    if sf_data.find(bios_date_offset_str) >= 0:
-    #if sf_data.rfind(bios_date_offset_str) >= 0:
-        bios_date_offset = sf_data.find(bios_date_offset_str) + bios_date_offset_str_offset
-        sf.seek(bios_date_offset)
-        bios_date_bin = sf.read(bios_date_size)
-        # 20YY/MM/DD
-        bios_date = '20' + format(int(hex(bios_date_bin[0])[2:]), '02') + '/' + format(int(hex(bios_date_bin[1])[2:]), '02') + '/' + format(int(hex(bios_date_bin[2])[2:]), '02')
-        sf.seek(0)
-        print("%s: BIOS date (%s) detected at offset (%s)." % (args.src, bios_date, hex(bios_date_offset)))
-    sf_header = sf.read(len(rel_header))
-    sf.seek(0)
-    # sort by size (large -> small) - F7A must be before F7G
-    # 1) F7A (5) 2) F7G (1)
-    for bios_header in bios_header_f7a, bios_header_f7g:
-        sf_bios_header = sf.read(len(bios_header))
-        sf.seek(0)
-        # header checks
-        if sf_header == rel_header:
-            print("%s: valid UNTRIMMED RELEASE BIOS detected." % args.src)
-            break
-        if sf_bios_header == bios_header:
-            bios_offset = 0x0
+    if bios_info['ec_rev']:
+        print("%s: EC revision (%s) detected at offset (%s)." % (args.src, bios_info['ec_rev'], hex(bios_info['ec_rev_offset'])))
+    if bios_info['ec_date']:
+        print("%s: EC date (%s) detected at offset (%s)." % (args.src, bios_info['ec_date'], hex(bios_info['ec_date_offset'])))
+    if bios_info['bios_date']:
+        print("%s: BIOS date (%s) detected at offset (%s)." % (args.src, bios_info['bios_date'], hex(bios_info['bios_date_offset'])))
+    # header checks
+    if bios_info['release']:
+        print("%s: valid UNTRIMMED RELEASE BIOS detected." % args.src)
+    elif bios_info['trimmed']:
+        #if args.dest:
+        if args.dest and not args.backup_uid and not args.generate_uid and not args.inject_uid and uids is None:
+            print("\n%s: warning: valid TRIMMED or BACKUP BIOS detected." % args.src)
+        else:
+            print("%s: valid TRIMMED or BACKUP BIOS detected." % args.src)
+        if src_size == bios_size:
             #if args.dest:
-            if args.dest and not args.backup_uid and not args.generate_uid and not args.inject_uid:
-                print("\n%s: warning: valid TRIMMED or BACKUP BIOS detected." % args.src)
+            if args.dest and not args.backup_uid and not args.generate_uid and not args.inject_uid and uids is None and not args.remove_uid and not args.compact and not args.delta:
+                print("%s: error: TRIMMED or BACKUP BIOS image! nothing to trim.\n" % args.src)
+                print("abort!\n")
+                return 6
+            if bios_ver:
+                print("%s: TRIMMED or BACKUP BIOS image version %s." % (args.src, bios_ver))
             else:
-                print("%s: valid TRIMMED or BACKUP BIOS detected." % args.src)
-            if os.path.getsize(args.src) == bios_size:
-                #if args.dest:
-                if args.dest and not args.backup_uid and not args.generate_uid and not args.inject_uid and not args.remove_uid:
-                    print("%s: error: TRIMMED or BACKUP BIOS image! nothing to trim.\n" % args.src)
-                    print("abort!\n")
-                    sys.exit(6)
-                if bios_ver:
-                    print("%s: TRIMMED or BACKUP BIOS image version %s." % (args.src, bios_ver))
-                else:
-                    print("%s: TRIMMED or BACKUP BIOS image." % args.src)
-                #sys.exit(6)
-            break
-        #else:
-            #continue
-    if sf_header != rel_header and sf_bios_header != bios_header:
-        #print("%s: warning: INVALID or UNKNOWN BIOS detected! | %s != %s" % (args.src, sf_header, rel_header))
-        #print("%s: warning: INVALID or UNKNOWN BIOS detected! | %s != %s" % (args.src, sf_bios_header, bios_header))
+                print("%s: TRIMMED or BACKUP BIOS image." % args.src)
+            #return 6
+    else:
         print("%s: warning: INVALID or UNKNOWN BIOS detected!" % args.src)
     # detect BIOS offset
-    if sf_bios_header != bios_header:
-        if sf_data.find(bios_offset_str) >= 0:
-            #bios_offset = sf_data.find(bios_offset_str)
-            bios_offset = sf_data.find(bios_offset_str) + bios_offset_str_offset
+    if not bios_info['trimmed']:
+        if bios_info['bios_offset_fallback'] is None:
             if bios_offset < 0:
                 print("%s: error: CORRUPT or INVALID BIOS detected! | %s fewer bytes!\n" % (args.src, abs(bios_offset)))
                 print("abort!\n")
-                sys.exit(7)
+                return 7
             print("%s: BIOS offset (%s) detected." % (args.src, hex(bios_offset)))
-            # detect BIOS image version
-            for drb_offset, drb_str in bios_offset_list:
-                if bios_offset == drb_offset:
-                    detect_rel_bios_ver = drb_str
-                    break
-                detect_rel_bios_ver = None
         else:
             print("%s: error: BIOS offset not detected!" % args.src)
-            invalid = True
             # fallback to (preset) bios_offset_list
-            for drb_offset, drb_str in bios_offset_list:
-                if isinstance(drb_offset, int) and isinstance(drb_str, str):
-                    print("using (fallback/preset) %s BIOS offset (%s)" % (drb_str, hex(drb_offset)))
-                    for bios_header in bios_header_f7a, bios_header_f7g:
-                        sf.seek(drb_offset)
-                        if sf.read(len(bios_header)) == bios_header:
-                            bios_offset = drb_offset
-                            invalid = None
-                            break
-                    if invalid:
-                        print("error: %s BIOS offset (%s) INVALID!" % (drb_str, hex(drb_offset)))
-                    else:
-                        break
+            for drb_offset, drb_str, drb_valid in bios_info['bios_offset_fallback']:
+                print("using (fallback/preset) %s BIOS offset (%s)" % (drb_str, hex(drb_offset)))
+                if not drb_valid:
+                    print("error: %s BIOS offset (%s) INVALID!" % (drb_str, hex(drb_offset)))
         if invalid:
             print("""\
 %s: error: INVALID or UNKNOWN BIOS offset detected!
@@ -575,124 +3492,156 @@ continuing (despite header mismatch!) ...
         else:
             print("%s: valid BIOS offset detected." % args.src)
     # detect UID offset
-    if sf_data.find(bios_uid_offset_str) >= 0:
-    #if sf_data.rfind(bios_uid_offset_str) >= 0:
-        bios_uid_offset = sf_data.find(bios_uid_offset_str)
-        #bios_uid_offset = sf_data.rfind(bios_uid_offset_str)
-        sf.seek(bios_uid_offset)
-        sf_uid_data = sf.read()
-        bios_uid_size = sf_uid_data.find(b'\xff' * 4)
-        sf.seek(bios_uid_offset)
-        bios_uid = sf.read(bios_uid_size)
-        sf.seek(0)
-        if not bios_uid or bios_uid == bios_uid_offset_str:
-            if os.path.getsize(args.src) == bios_size:
+    if bios_uid_offset is not None:
+        if not bios_info['bios_uid']:
+            if src_size == bios_size:
                 #print("%s: warning: NO/NULL UID offset (%s) detected! DO NOT FLASH!" % (args.src, hex(bios_uid_offset)))
                 print("%s: warning: NO/NULL UID offset (%s) detected! DO NOT FLASH! INJECT UID (-i)" % (args.src, hex(bios_uid_offset)))
             # maybe use rel_bios_size_list
-            elif os.path.getsize(args.src) > bios_size:
+            elif src_size > bios_size:
                 print("%s: NO/NULL UID offset (%s) detected. TRIM AND INJECT UID (-i) OR FLASH WITH H2OFFT!" % (args.src, hex(bios_uid_offset)))
         else:
             print("%s: UID offset (%s) detected. byte size (%s)." % (args.src, hex(bios_uid_offset), bios_uid_size))
             if args.backup_uid:
-                if os.path.isfile(args.backup_uid):
-                    print("error: UID file (%s) preexists! refuse to overwrite (nondestructive).\n" % args.backup_uid)
-                    print("abort!\n")
-                    sys.exit(8)
-                with open(args.backup_uid, 'wb') as uid_df:
-                    uid_df.write(bios_uid)
+                backup_uid(args.src, args.backup_uid, bios_info)
                 #print("%s: successfully backed up UID file (%s).\n%s: successfully made UID file." % (args.src, args.backup_uid, args.backup_uid))
                 print("%s: successfully backed up UID file (%s)." % (args.src, args.backup_uid))
-    #sf.seek(bios_offset)
-    # inject UID file
-    if args.inject_uid and os.path.isfile(args.src) and bios_uid_offset >= 0 and bios_uid_offset >= bios_offset:
-        sf.seek(bios_offset)
-        # potentially inflate/pad bios_uid_inject
-        if bios_uid_size > len(bios_uid_inject):
-            print("%s: inflating/padding UID byte size: %s -> %s | padding byte size (%s)." % (args.src, len(bios_uid_inject), bios_uid_size, bios_uid_size - len(bios_uid_inject)))
-            # must be AFTER print()
-            bios_uid_inject += b'\xff' * (bios_uid_size - len(bios_uid_inject))
-        #bios = sf.read(bios_uid_offset - bios_offset)
-        #bios += bios_uid_inject
-        bios = sf.read(bios_uid_offset - bios_offset) + bios_uid_inject
-        # relative seek(,1)
-        sf.seek(len(bios_uid_inject), 1)
-        if bios_size >= len(bios):
-            #bios += sf.read(bios_size - (bios_uid_offset - bios_offset) - len(bios_uid_inject))
-            bios += sf.read(bios_size - len(bios))
-        else:
-            print("""\
-error: injected BIOS greater than BIOS byte size! | %s > %s | %s extra bytes!
-error: CORRUPT or INVALID injected BIOS detected!
-""" % (len(bios), bios_size, len(bios) - bios_size))
-            sys.exit(9)
-        print("%s: injected UID file (%s) at offset (%s) | byte size (%s)." % (args.src, args.inject_uid, hex(bios_uid_offset), len(bios_uid_inject)))
-    # remove UID (inject blank UID)
-    elif args.remove_uid:
-        sf.seek(bios_offset)
-        bios = sf.read(bios_uid_offset - bios_offset) + b'\xff' * bios_uid_size
-        # relative seek(,1)
-        sf.seek(bios_uid_size, 1)
-        #bios += sf.read(bios_size - (bios_uid_offset - bios_offset) - len(bios_uid_inject))
-        bios += sf.read(bios_size - len(bios))
-    # RAW BIOS
-    else:
-        sf.seek(bios_offset)
-        bios = sf.read(bios_size)
+                if registry is not None:
+                    me, f = registry_add(registry, 'backup', [bios_info['bios_uid'].tobytes()], bios_ver and bios_ver[:3], args.src, [args.backup_uid])[0]
+                    print("%s: successfully registered backed-up UID (%s/%s) (%s)." % (args.src, me, f, args.registry))
 
-# BIOS byte size check
-if len(bios) == bios_size:
-    print("%s: valid BIOS byte size (%s) detected." % (args.src, len(bios)))
-else:
-    print("""\
+    # inject UID file / remove UID (inject blank UID) / RAW BIOS
+    bios = build_bios(bios_info, bios_uid_inject, args.remove_uid)
+    if bios['uid_inject'] is not None:
+        if bios['uid_padding']:
+            print("%s: inflating/padding UID byte size: %s -> %s | padding byte size (%s)." % (args.src, len(bios_uid_inject), len(bios['uid_inject']), bios['uid_padding']))
+        print("%s: injected UID file (%s) at offset (%s) | byte size (%s)." % (args.src, args.inject_uid, hex(bios_uid_offset), len(bios['uid_inject'])))
+
+    # BIOS byte size check
+    if bios['size'] == bios_size:
+        print("%s: valid BIOS byte size (%s) detected." % (args.src, bios['size']))
+    else:
+        print("""\
 %s: error: BIOS byte size mismatch! | %s != %s | %s byte size difference!
 %s: error: CORRUPT or INVALID BIOS detected!
-""" % (args.src, len(bios), bios_size, len(bios) - bios_size, args.src))
-    print("abort!\n")
-    sys.exit(10)
-
-if not invalid:
-    if detect_rel_bios_ver:
-        if bios_ver:
-            print("%s: UNTRIMMED RELEASE BIOS image version %s | %s.\n" % (args.src, bios_ver, detect_rel_bios_ver))
-        else:
-            print("%s: UNTRIMMED RELEASE BIOS image version %s.\n" % (args.src, detect_rel_bios_ver))
-    elif bios_ver:
-        print("%s: BIOS image version %s.\n" % (args.src, bios_ver))
-    else:
-        if os.path.getsize(args.src) > bios_size:
-            print("%s: warning: INVALID or UNKNOWN (UNTRIMMED RELEASE?) BIOS image!\n" % args.src)
-        elif os.path.getsize(args.src) == bios_size:
-            print("%s: warning: INVALID or UNKNOWN (TRIMMED or BACKUP?) BIOS image!\n" % args.src)
+""" % (args.src, bios['size'], bios_size, bios['size'] - bios_size, args.src))
+        print("abort!\n")
+        return 10
+
+    if not invalid:
+        if bios_info['detect_rel_bios_ver']:
+            if bios_ver:
+                print("%s: UNTRIMMED RELEASE BIOS image version %s | %s.\n" % (args.src, bios_ver, bios_info['detect_rel_bios_ver']))
+            else:
+                print("%s: UNTRIMMED RELEASE BIOS image version %s.\n" % (args.src, bios_info['detect_rel_bios_ver']))
+        elif bios_ver:
+            print("%s: BIOS image version %s.\n" % (args.src, bios_ver))
         else:
-            print("%s: warning: INVALID or UNKNOWN BIOS image!\n" % args.src)
+            if src_size > bios_size:
+                print("%s: warning: INVALID or UNKNOWN (UNTRIMMED RELEASE?) BIOS image!\n" % args.src)
+            elif src_size == bios_size:
+                print("%s: warning: INVALID or UNKNOWN (TRIMMED or BACKUP?) BIOS image!\n" % args.src)
+            else:
+                print("%s: warning: INVALID or UNKNOWN BIOS image!\n" % args.src)
 
-# exit if no DESTINATION BIOS image SPECIFIED
-if not args.dest:
-    sys.exit(0)
+    # exit if no DESTINATION BIOS image SPECIFIED
+    if not args.dest:
+        return 0
 
-# DESTINATION BIOS image check
-if os.path.isfile(args.dest):
-    print("error: DESTINATION BIOS image (%s) preexists! refuse to overwrite (nondestructive).\n" % args.dest)
-    print("abort!\n")
-    sys.exit(11)
+    # write DESTINATION BIOS image per UID (DESTINATION directory)
+    if uids is not None:
+        failed = 0
+        for result in inject_uids(args.src, args.dest, uids, bios_info, verify=args.verify):
+            if result['uid_padding']:
+                print("%s: inflating/padding UID byte size: %s -> %s | padding byte size (%s)." % (result['dest'], result['uid_size'] - result['uid_padding'], result['uid_size'], result['uid_padding']))
+            print("%s: injected UID (%s) at offset (%s) | byte size (%s)%s." % (result['dest'], result['uid'], hex(bios_uid_offset), result['uid_size'], ' | reflinked' if result['cloned'] else ''))
+            if args.verify and not print_verify(result['verify']):
+                failed += 1
+        print("")
+        if failed:
+            print("%s: error: %s of %s DESTINATION BIOS images FAILED verification!\n" % (args.dest, failed, len(uids)))
+            return 18
+        if invalid:
+            print("""\
+⚠️ MANUALLY CHECK/VERIFY TRIMMED BIOS INTEGRITY! ⚠️
 
-# write DESTINATION BIOS image binary
-with open(args.dest, 'wb') as df:
-    df.write(bios)
+%s: warning: potentially CORRUPT or INVALID or UNKNOWN BIOS detected!
 
-if invalid:
-    print("""\
+%s: warning: potentially TRIMMED BIOS: %s -> %s (%s UIDs)
+""" % (args.src, args.dest, args.src, args.dest, len(uids)))
+            return 12
+        print("%s: successfully made %s BIOS images: %s -> %s\n" % (args.dest, len(uids), args.src, args.dest))
+        return 0
+
+    # write DESTINATION delta (changed erase blocks vs CURRENT chip image) and layout list
+    if args.delta:
+        if not os.path.isfile(args.delta):
+            print("error: CURRENT chip image (%s) does not exist!\n" % args.delta)
+            return 4
+        chip = open_bios(args.delta)
+        if len(chip) != bios_size:
+            print("%s: error: CURRENT chip image byte size mismatch! | %s != %s\n" % (args.delta, len(chip), bios_size))
+            return 20
+        target = assemble_bios(bios['segments'], bios_info['data'])
+        blocks = delta_blocks(target, chip, args.delta_mode)
+        # layout list first (refuse to overwrite) - removed again if the delta is refused
+        write_layout(args.dest + delta_layout_ext, blocks)
+        try:
+            delta_size = write_delta(args.dest, target, chip, blocks)
+        except BiosError:
+            os.remove(args.dest + delta_layout_ext)
+            raise
+        sectors = len([block for block in blocks if block[1] == flash_erase_size_list[0]])
+        print("%s: delta (%s) vs CURRENT chip image (%s) | %s changed erase blocks (%s 4KB sectors, %s 64KB blocks, %s erase only) | %s of %s bytes | byte size (%s)." % (
+            args.dest, args.delta_mode, args.delta, len(blocks), sectors, len(blocks) - sectors, len([block for block in blocks if block[2]]),
+            sum(block[1] for block in blocks), bios_size, delta_size))
+        print("%s: layout list (%s) | estimated erase/program time %.1fs (full chip %.1fs)." % (
+            args.dest, args.dest + delta_layout_ext, sum(flash_erase_ms[size] if erase else flash_time(size) for offset, size, erase in blocks) / 1000,
+            flash_time(flash_erase_size_list[1], bios_size // flash_erase_size_list[1]) / 1000))
+        if args.verify:
+            if apply_delta(chip, args.dest) != target:
+                print("%s: error: delta verification FAILED!\n" % args.dest)
+                return 18
+            print("%s: delta verified (CURRENT chip image + delta == DESTINATION BIOS image)." % args.dest)
+        print("")
+        return 12 if invalid else 0
+
+    # write DESTINATION compact container (erased runs not stored)
+    if args.compact:
+        target = assemble_bios(bios['segments'], bios_info['data'])
+        result = write_compact(args.dest, target, args.compact)
+        print("%s: compact container (%s) | %s erased runs | %s of %s bytes erased | file byte size (%s) | disk byte size (%s)." % (
+            args.dest, result['layout'], result['runs'], result['erased'], result['size'], result['file_size'], result['disk_size']))
+        if args.verify:
+            if expand_compact(open_bios(args.dest), args.dest) != target:
+                print("%s: error: compact container verification FAILED!\n" % args.dest)
+                return 18
+            print("%s: compact container verified (expanded == DESTINATION BIOS image)." % args.dest)
+        print("")
+        return 12 if invalid else 0
+
+    # write DESTINATION BIOS image binary
+    write_bios(args.dest, bios['segments'], args.src)
+    if args.verify and not print_verify(verify_bios(args.dest, bios['segments'], bios_info['data'], bios_info)):
+        print("")
+        return 18
+
+    if invalid:
+        print("""\
 ⚠️ MANUALLY CHECK/VERIFY TRIMMED BIOS INTEGRITY! ⚠️
 
 %s: warning: potentially CORRUPT or INVALID or UNKNOWN BIOS detected!
 
 %s: warning: potentially TRIMMED BIOS: %s -> %s
 """ % (args.dest, args.dest, args.src, args.dest))
-    sys.exit(12)
+        return 12
+
+    if src_size > bios_size:
+        print("%s: successfully TRIMMED BIOS: %s -> %s\n" % (args.dest, args.src, args.dest))
+    elif src_size == bios_size:
+        print("%s: successfully made BIOS: %s -> %s\n" % (args.dest, args.src, args.dest))
+    return 0
+
 
-if os.path.getsize(args.src) > bios_size:
-    print("%s: successfully TRIMMED BIOS: %s -> %s\n" % (args.dest, args.src, args.dest))
-elif os.path.getsize(args.src) == bios_size:
-    print("%s: successfully made BIOS: %s -> %s\n" % (args.dest, args.src, args.dest))
-sys.exit(0)
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL
+# was not distributed with this file, You can obtain one
+# at https://mozilla.org/MPL/2.0/.
+
+"""
+Steam Deck (Jupiter) BIOS Tool - round-trip tests on synthetic BIOS images
+
+  python -m unittest test_jupiter_bios_tool   (or python -m pytest)
+"""
+
+import contextlib
+import importlib.machinery
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import types
+import unittest
+import unittest.mock
+import zipfile
+
+loader = importlib.machinery.SourceFileLoader('jupiter_bios_tool', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jupiter-bios-tool.py'))
+jbt = types.ModuleType(loader.name)
+# importable by name - batch/watch worker processes (pickled functions)
+sys.modules[loader.name] = jbt
+loader.exec_module(jbt)
+
+
+def run(*argv):
+    """run CLI (output discarded) - exit status"""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return jbt.main(list(argv))
+
+
+def read(path):
+    """file bytes"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class SyntheticTest(unittest.TestCase):
+    """synthetic F7G/F7A UNTRIMMED RELEASE and TRIMMED (BACKUP) images - trimmed/UID bytes checked against the known layout"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp(prefix='jupiter-bios-tool-test-')
+        # analysis cache (--cache) kept out of the user's cache directory
+        jbt.analysis_cache_dir = os.path.join(cls.tmp, 'cache')
+        paths = jbt.synthesize(os.path.join(cls.tmp, 'synthetic'))
+        cls.releases = [path for path in paths if path.endswith('_sign.fd')]
+        cls.backups = [path for path in paths if not path.endswith('_sign.fd')]
+        # UID of another (seed) synthetic image - injected
+        cls.uid_file = os.path.join(cls.tmp, 'other-uid.bin')
+        with open(cls.uid_file, 'wb') as f:
+            f.write(bytes(jbt.generate_uids(1, seed=1)['uids']))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def path(self, name):
+        return os.path.join(self.tmp, self.id().rsplit('.', 1)[-1] + '-' + name)
+
+    def expected_trim(self, src):
+        """trimmed bytes - the BIOS window of SOURCE at its BIOS offset"""
+        data = read(src)
+        offset = jbt.analyze(src)['bios_offset']
+        return data[offset:offset + jbt.bios_size]
+
+    def test_trim(self):
+        for src in self.releases:
+            dest = self.path(os.path.basename(src))
+            self.assertEqual(run(src, dest), 0)
+            self.assertEqual(read(dest), self.expected_trim(src))
+        for src in self.backups:
+            self.assertEqual(run(src, self.path(os.path.basename(src))), 6)
+
+    def test_backup_uid(self):
+        for src in self.releases + self.backups:
+            info = jbt.analyze(src)
+            uid_file = self.path(os.path.basename(src) + '-uid.bin')
+            self.assertEqual(run(src, '-b', uid_file), 0)
+            self.assertEqual(read(uid_file), read(src)[info['bios_uid_offset']:info['bios_uid_offset'] + info['bios_uid_size']])
+
+    def test_inject_uid(self):
+        uid = read(self.uid_file)
+        src = self.releases[0]
+        dest = self.path('injected.bin')
+        self.assertEqual(run(src, dest, '-i', self.uid_file), 0)
+        info = jbt.analyze(src)
+        uid_offset = info['bios_uid_offset'] - info['bios_offset']
+        expected = bytearray(self.expected_trim(src))
+        expected[uid_offset:uid_offset + len(uid)] = uid
+        self.assertEqual(read(dest), bytes(expected))
+        # backed up UID of the injected image is the injected UID
+        uid_file = self.path('injected-uid.bin')
+        self.assertEqual(run(dest, '-b', uid_file), 0)
+        self.assertEqual(read(uid_file), uid)
+
+    def test_stream(self):
+        for src in self.releases:
+            for option in (), ('-r',), ('-i', self.uid_file):
+                dest, streamed = self.path('file.bin'), self.path('streamed.bin')
+                self.assertEqual(run(src, dest, *option), 0)
+                self.assertEqual(run(src, streamed, '--stream', *option), 0)
+                self.assertEqual(read(streamed), read(dest))
+                os.remove(dest)
+                os.remove(streamed)
+        self.assertEqual(run(self.releases[0], self.path('delta.bin'), '--stream', '--delta', self.backups[0]), 29)
+        self.assertFalse(os.path.exists(self.path('delta.bin')))
+        # preexisting DESTINATION - refused (nondestructive), left untouched
+        existing = self.path('existing.bin')
+        with open(existing, 'wb') as f:
+            f.write(b'existing')
+        self.assertEqual(run(self.releases[0], existing, '--stream'), 11)
+        self.assertEqual(read(existing), b'existing')
+
+    def test_delta(self):
+        src, chip = self.releases[0], self.backups[0]
+        delta, dest = self.path('delta.bin'), self.path('applied.bin')
+        self.assertEqual(run(src, delta, '-i', self.uid_file, '--delta', chip, '--verify'), 0)
+        self.assertEqual(run(chip, dest, '--apply-delta', delta), 0)
+        trimmed = self.path('trimmed.bin')
+        self.assertEqual(run(src, trimmed, '-i', self.uid_file), 0)
+        self.assertEqual(read(dest), read(trimmed))
+
+    def test_delta_trimmed_target(self):
+        target, chip = self.path('target.bin'), self.backups[0]
+        self.assertEqual(run(self.releases[0], target, '-i', self.uid_file), 0)
+        delta, dest = self.path('delta.bin'), self.path('applied.bin')
+        self.assertEqual(run(target, delta, '--delta', chip, '--verify'), 0)
+        self.assertEqual(run(chip, dest, '--apply-delta', delta), 0)
+        self.assertEqual(read(dest), read(target))
+        # DESTINATION layout list preexists - refused, no delta written
+        os.remove(delta)
+        self.assertEqual(run(target, delta, '--delta', chip), 11)
+        self.assertFalse(os.path.exists(delta))
+
+    def test_compact(self):
+        for layout in jbt.compact_layout_list:
+            src = self.releases[0]
+            container, dest = self.path(layout + '.jbtc'), self.path(layout + '-expanded.bin')
+            self.assertEqual(run(src, container, '--compact', layout), 0)
+            if layout == 'packed':
+                self.assertLess(os.path.getsize(container), jbt.bios_size)
+            self.assertEqual(run(container, dest, '--expand'), 0)
+            self.assertEqual(read(dest), self.expected_trim(src))
+
+    def test_store(self):
+        store = self.path('store')
+        for src in self.releases + self.backups:
+            self.assertEqual(run('--store', store, src, '--device', os.path.basename(src)), 0)
+        for src in self.releases + self.backups:
+            dest = self.path(os.path.basename(src) + '-restored.bin')
+            self.assertEqual(run('--store', store, '--restore', os.path.basename(src), dest), 0)
+            self.assertEqual(read(dest), read(src))
+
+    def test_batch_jobs(self):
+        directory = os.path.dirname(self.releases[0])
+        self.assertEqual(run('--batch', directory, '-j', '2'), 0)
+        for jobs in '0', '-1':
+            self.assertEqual(run('--batch', directory, '-j', jobs), 15)
+
+    def test_generate_uids(self):
+        gen = jbt.generate_uids(256, seed=7)
+        # no duplicate ME/F serial within the batch
+        self.assertEqual(len(set(me for me, f in gen['serials'])), 256)
+        self.assertEqual(len(set(f for me, f in gen['serials'])), 256)
+        # seeded runs deterministic
+        self.assertEqual(jbt.generate_uids(256, seed=7)['uids'], gen['uids'])
+        self.assertNotEqual(jbt.generate_uids(256, seed=8)['uids'], gen['uids'])
+        for count in 0, -1:
+            with self.assertRaises(jbt.BiosError):
+                jbt.generate_uids(count)
+        # bulk CLI - one UID file per serial
+        out_dir = self.path('uids') + os.sep
+        self.assertEqual(run('-g', out_dir, '-n', '8', '--seed', '7'), 0)
+        self.assertEqual(sorted(os.listdir(out_dir)), sorted(jbt.generate_uid_dir_file % f for me, f in gen['serials'][:8]))
+
+    def test_parse_dmi(self):
+        for f7a in False, True:
+            gen = jbt.generate_uids(1, f7a, seed=3)
+            uid = bytes(gen['uids'])
+            me, f = gen['serials'][0]
+            dmi = jbt.parse_dmi(uid + b'\xff' * 0x100)
+            self.assertTrue(dmi['valid'])
+            self.assertEqual(dmi['size'], len(uid))
+            self.assertEqual(sum(record['size'] for record in dmi['records']) + len(jbt.bios_uid_offset_str), len(uid))
+            self.assertEqual(set(record['value'] for record in dmi['records'] if record['kind'] == 'me_serial'), {me})
+            self.assertEqual(set(record['value'] for record in dmi['records'] if record['kind'] == 'f_serial'), {f})
+        self.assertIsNone(jbt.parse_dmi(b'\xff' * 0x100))
+        # malformed - truncated record, record past the data, undersized record header: invalid, stopped at the last whole record
+        self.assertFalse(jbt.parse_dmi(uid[:len(uid) - 1])['valid'])
+        for header in b'\x02\x07\x00\xff\xff', b'\x02\x07\x00\x01\x00':
+            dmi = jbt.parse_dmi(jbt.bios_uid_offset_str + header + b'\x00' * 0x10)
+            self.assertFalse(dmi['valid'])
+            self.assertEqual(dmi['size'], len(jbt.bios_uid_offset_str))
+        # unterminated record stream - bounded by the limit
+        dmi = jbt.parse_dmi(jbt.bios_uid_offset_str + b'\x01' * 0x100000)
+        self.assertLessEqual(dmi['size'], jbt.dmi_max_size)
+
+    def test_registry(self):
+        registry = self.path('registry.db')
+        first, second = self.path('first.bin'), self.path('second.bin')
+        self.assertEqual(run('-g', first, '--seed', '5', '--registry', registry), 0)
+        # same seed - registered serial rejected, another one generated
+        self.assertEqual(run('-g', second, '--seed', '5', '--registry', registry), 0)
+        serials = []
+        for uid_file in first, second:
+            records = jbt.parse_dmi(read(uid_file))['records']
+            serials.append([record['value'] for record in records if record['kind'] in ('me_serial', 'f_serial')])
+        self.assertTrue(set(serials[0]).isdisjoint(serials[1]))
+        # backed-up UID registered too
+        self.assertEqual(run(self.releases[0], '-b', self.path('backup.bin'), '--registry', registry), 0)
+        backup = jbt.parse_dmi(jbt.analyze(self.releases[0])['bios_uid'])
+        me = [record['value'] for record in backup['records'] if record['kind'] == 'me_serial'][0]
+        connection = jbt.registry_open(registry)
+        try:
+            self.assertEqual([record['kind'] for record in jbt.registry_find(connection, me)], ['backup'])
+            self.assertTrue(jbt.registry_taken(connection, serials[0][0], 'F0000000000'))
+        finally:
+            connection.close()
+        for serial in serials[0][0], serials[1][1], me:
+            self.assertEqual(run('--registry-find', serial, '--registry', registry), 0)
+        self.assertEqual(run('--registry-find', 'MEYX00000000', '--registry', registry), 24)
+
+    def test_archive(self):
+        member_dir = 'jupiter-hw-support-master/usr/share/jupiter_bios/'
+        archives = {'zip': self.path('bios.zip'), 'tar': self.path('bios.tar'), 'tar.gz': self.path('bios.tar.gz')}
+        with zipfile.ZipFile(archives['zip'], 'w') as archive:
+            for src in self.releases:
+                archive.write(src, member_dir + os.path.basename(src))
+        for kind, mode in ('tar', 'w'), ('tar.gz', 'w:gz'):
+            with tarfile.open(archives[kind], mode) as archive:
+                for src in self.releases:
+                    archive.add(src, member_dir + os.path.basename(src))
+        for kind, archive in sorted(archives.items()):
+            for stdin in False, True:
+                dest_dir = self.path('%s-%s' % (kind, 'stdin' if stdin else 'file'))
+                if stdin:
+                    with open(archive, 'rb') as f, unittest.mock.patch('sys.stdin', io.TextIOWrapper(io.BytesIO(f.read()))):
+                        self.assertEqual(run('-', dest_dir), 0)
+                else:
+                    self.assertEqual(run(archive, dest_dir), 0)
+                for src in self.releases:
+                    name = jbt.archive_dest_file % (os.path.splitext(os.path.basename(src))[0], 'trimmed')
+                    self.assertEqual(read(os.path.join(dest_dir, name)), self.expected_trim(src))
+        self.assertEqual(run(archives['zip'], self.path('zip-backup'), '-b', self.path('uid.bin')), 29)
+
+    def test_cache(self):
+        src = self.path('cached_sign.fd')
+        shutil.copyfile(self.releases[0], src)
+        for mode in jbt.analysis_cache_mode_list:
+            self.assertFalse(jbt.analyze(src, cache=mode)['cached'])
+            info = jbt.analyze(src, cache=mode)
+            self.assertTrue(info['cached'])
+            self.assertEqual(info['bios_ver'], jbt.rel_bios_ver_f7g)
+        # SOURCE changed (content, size, mtime) - cache entry stale, rescanned
+        shutil.copyfile(self.releases[1], src)
+        st = os.stat(src)
+        os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        for mode in jbt.analysis_cache_mode_list:
+            info = jbt.analyze(src, cache=mode)
+            self.assertFalse(info['cached'])
+            self.assertEqual(info['bios_ver'], jbt.rel_bios_ver_f7a)
+
+    def test_verify(self):
+        src = self.releases[0]
+        dest = self.path('verified.bin')
+        self.assertTrue(jbt.trim(src, dest, verify=True)['verify']['verified'])
+        info = jbt.analyze(src)
+        segments = jbt.build_bios(info, None, False)['segments']
+        # corrupted DESTINATION - first mismatching byte reported
+        with open(dest, 'r+b') as f:
+            f.seek(0x123456)
+            byte = f.read(1)
+            f.seek(0x123456)
+            f.write(bytes([byte[0] ^ 0xff]))
+        verify = jbt.verify_bios(dest, segments, info['data'], info)
+        self.assertFalse(verify['verified'])
+        self.assertEqual(verify['mismatches'], [('SOURCE', 0x123456)])
+        # truncated DESTINATION
+        with open(dest, 'r+b') as f:
+            f.truncate(jbt.bios_size - 0x10)
+        self.assertIn(('SIZE', jbt.bios_size - 0x10), jbt.verify_bios(dest, segments, info['data'], info)['mismatches'])
+
+    def test_diff(self):
+        src = self.releases[0]
+        trimmed, injected = self.path('trimmed.bin'), self.path('injected.bin')
+        self.assertEqual(run(src, trimmed), 0)
+        self.assertEqual(run(src, injected, '-i', self.uid_file), 0)
+        # untrimmed vs trimmed - aligned at the BIOS offset, identical
+        self.assertEqual(run(src, '--diff', trimmed), 0)
+        self.assertEqual(jbt.diff_bios(jbt.analyze(src), jbt.analyze(trimmed))['ranges'], [])
+        # injected UID - changed ranges within the UID region only
+        info = jbt.analyze(src)
+        diff = jbt.diff_bios(info, jbt.analyze(injected))
+        uid_start = info['bios_uid_offset'] - info['bios_offset']
+        self.assertTrue(diff['ranges'])
+        for start, end, names in diff['ranges']:
+            self.assertEqual(names, ['UID'])
+            self.assertTrue(uid_start <= start < end <= uid_start + info['bios_uid_size'])
+        self.assertEqual(run(src, '--diff', injected), 19)
+        # changed BIOS version mirror - annotated
+        data = bytearray(read(trimmed))
+        mirror = info['bios_ver_offset'] - info['bios_offset'] + 0x800000
+        data[mirror] ^= 0xff
+        changed = self.path('changed.bin')
+        with open(changed, 'wb') as f:
+            f.write(data)
+        self.assertEqual(jbt.diff_bios(jbt.analyze(trimmed), jbt.analyze(changed))['ranges'], [(mirror, mirror + 1, ['BIOS version (mirror)'])])
+
+    def test_release(self):
+        library = os.path.dirname(self.releases[0])
+        for query, version in ('latest-f7g', jbt.rel_bios_ver_f7g), ('latest-f7a', jbt.rel_bios_ver_f7a), (jbt.rel_bios_ver_f7a, jbt.rel_bios_ver_f7a):
+            src = [path for path in self.releases if version in os.path.basename(path)][0]
+            dest = self.path(query + '.bin')
+            self.assertEqual(run('--library', library, '--release', query, dest), 0)
+            self.assertEqual(read(dest), self.expected_trim(src))
+        entries, refreshed = jbt.library_index(library)
+        self.assertEqual(refreshed, 0)
+        self.assertEqual(jbt.library_resolve(entries, 'latest-f7g')['name'], os.path.basename(self.releases[0]))
+        self.assertIsNone(jbt.library_resolve(entries, 'latest-f7x'))
+        self.assertEqual(run('--library', library, '--release', 'latest-f7x', self.path('none.bin')), 28)
+
+    def test_region_ec_mirror(self):
+        for src in self.releases + self.backups:
+            info, method = jbt.locate_regions(src, ('ec', 'ec-mirror'))
+            self.assertEqual(jbt.region_sha256(info, 'ec'), jbt.region_sha256(info, 'ec-mirror'))
+
+
+if __name__ == '__main__':
+    unittest.main()